@@ -0,0 +1,15 @@
+"""
+Gunicorn settings for the Ted API.
+Run with:  gunicorn -c gunicorn_conf.py main:app
+"""
+
+import os
+
+# Streaming turns are mostly spent in Python framing, so scale out across cores;
+# WEB_CONCURRENCY overrides the default
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1)))
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+keepalive = 75
+loglevel = "warning"
+accesslog = None
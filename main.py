@@ -3,14 +3,17 @@ FastAPI backend for the Ted mobile app.
 Refactored into a clean, modular structure.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.config import DEFAULT_USER_ID
+from src.boot import get_llm_client, get_memory_manager, warm_up_async_llm
+from src.config import DEFAULT_USER_ID, PRODUCTION
 from src.chat import get_ted_instances_count
+from src.ted import drain_background_tasks
 from src.api.chat_routes import router as chat_router
 from src.api.transcription_routes import router as transcription_router
 
@@ -30,8 +33,17 @@ async def lifespan(app: FastAPI):
     """
     logger.info("Ted API is starting up")
     logger.info(f"Default user_id: {DEFAULT_USER_ID}")
+    # Build the shared clients before serving so the first chat doesn't pay for it
+    await asyncio.gather(
+        asyncio.to_thread(get_llm_client), asyncio.to_thread(get_memory_manager)
+    )
+    # Streaming and transcription go through the async pool; open it here too
+    await warm_up_async_llm(get_llm_client())
     yield
     logger.info("Ted API is shutting down")
+    # Let replies that already streamed finish saving to Mem0
+    await drain_background_tasks()
+    await get_llm_client().aclose()
     logger.info(f"Served {get_ted_instances_count()} unique users")
 
 
@@ -41,6 +53,10 @@ app = FastAPI(
     description="AI mentor backend for the Ted mobile app",
     version="1.0.0",
     lifespan=lifespan,
+    # No client uses the interactive docs in production; skip building them
+    docs_url=None if PRODUCTION else "/docs",
+    redoc_url=None if PRODUCTION else "/redoc",
+    openapi_url=None if PRODUCTION else "/openapi.json",
 )
 
 # Enable CORS for all origins and methods (for development)
@@ -70,4 +86,15 @@ logger.info("Ted API service initialized")
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop + httptools take the event loop and HTTP parsing out of pure Python;
+    # access logs are off so long-lived SSE streams don't pay per-request logging
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False,
+        timeout_keep_alive=75,
+    )
@@ -8,7 +8,21 @@ and persistent memory to offer personalized guidance.
 from src.ted import Ted
 from src.memory import MemoryManager
 from src.llm import LLMClient
-from src.boot import memory_manager, llm_client
 
 __version__ = "0.1.0"
 __all__ = ["Ted", "MemoryManager", "LLMClient", "memory_manager", "llm_client"]
+
+
+def __getattr__(name: str):
+    """Build the shared clients only when ``src.memory_manager``/``src.llm_client`` is used."""
+    # Only the two lazy names may import boot: ``from src import boot`` probes
+    # this hook before the submodule exists, and importing it here would recurse
+    if name == "memory_manager":
+        from src.boot import get_memory_manager
+
+        return get_memory_manager()
+    if name == "llm_client":
+        from src.boot import get_llm_client
+
+        return get_llm_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,7 +6,7 @@ Run this file directly to start a CLI session with Ted.
 """
 
 from src.ted import Ted
-from src.boot import memory_manager, llm_client
+from src.boot import get_llm_client, get_memory_manager
 from src.config import DEFAULT_USER_ID
 
 if __name__ == "__main__":
@@ -14,7 +14,7 @@ if __name__ == "__main__":
     Entry point for the Ted CLI REPL.
     Continuously prompts the user for input and prints Ted's response.
     """
-    ted = Ted(memory_manager, llm_client, user_id=DEFAULT_USER_ID)
+    ted = Ted(get_memory_manager(), get_llm_client(), user_id=DEFAULT_USER_ID)
     print(f"Ted initialized. Type 'exit' or 'quit' to end the session.")
 
     while True:
@@ -2,12 +2,16 @@
 Chat-related API routes.
 """
 
+import asyncio
+
+import orjson
 from fastapi import APIRouter, Request, Query
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
 
-from ..models import ChatRequest, ChatResponse, ChatLogMessage
+from ..models import ChatRequest, ChatResponse, ChatLogMessage, ChatStreamRequest
 from ..config import DEFAULT_USER_ID
-from ..boot import memory_manager
+from ..boot import get_memory_manager
 from ..chat import handle_chat_request, handle_chat_stream
 
 import logging
@@ -16,9 +20,11 @@ logger = logging.getLogger("ted_api.chat_routes")
 
 router = APIRouter(tags=["chat"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 @router.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest) -> ChatResponse:
+async def chat_endpoint(request: ChatRequest) -> ChatResponse:
     """
     Simple chat endpoint. Replace with real Ted logic if needed.
     """
@@ -26,20 +32,18 @@ def chat_endpoint(request: ChatRequest) -> ChatResponse:
 
 
 @router.post("/chat/stream")
-async def chat_stream(request: Request):
+async def chat_stream(request: ChatStreamRequest):
     """
     Streams the chat response using Server-Sent Events (SSE).
     """
-    body = await request.json()
-    message = body.get("message", "")
-    user_id = body.get("user_id", DEFAULT_USER_ID)
-    test_mode = body.get("test_mode", False)
-
-    return await handle_chat_stream(message, user_id, test_mode)
+    return await handle_chat_stream(
+        request.message, request.user_id or DEFAULT_USER_ID, request.test_mode
+    )
 
 
 @router.get("/chatlog", response_model=List[ChatLogMessage])
-def chatlog_endpoint(
+async def chatlog_endpoint(
+    request: Request,
     user_id: Optional[str] = Query(None),
     limit: Optional[int] = Query(
         None, description="Maximum number of messages to return"
@@ -49,23 +53,61 @@ def chatlog_endpoint(
     """
     Returns the recent chat log for the specified user or DEFAULT_USER_ID if not specified.
     Supports pagination via limit and offset parameters.
+
+    Clients sending ``Accept: application/x-ndjson`` get one message per line,
+    streamed as it is encoded, instead of a single JSON array.
+
+    Paginated responses carry an ETag; a matching ``If-None-Match`` gets a 304
+    without the log being read.
     """
     user = user_id if user_id else DEFAULT_USER_ID
     logger.info(f"Fetching chat log for user: {user}, limit: {limit}, offset: {offset}")
+    memory_manager = get_memory_manager()
+    ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    # Only apply time filtering for legacy calls without pagination
+    use_time_filtering = offset == 0 and limit is None
+
+    # The same URL serves JSON or NDJSON depending on Accept
+    headers = {"Vary": "Accept"}
+    # Time-filtered results depend on the clock, not just the log, so only
+    # paginated reads are cacheable. ETags are scoped to the URL, which already
+    # names the user, so the raw user_id (any unicode, quotes) stays out of it.
+    if not use_time_filtering:
+        etag = (
+            f'W/"{memory_manager.log_version(user)}:{offset}:{limit}'
+            f'{":nd" if ndjson else ""}"'
+        )
+        headers["ETag"] = etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
 
     try:
-        # Pass pagination parameters to fetch_recent
-        messages = memory_manager.fetch_recent(
+        # Pass pagination parameters to fetch_recent; the log read is blocking,
+        # so keep it off the event loop
+        messages = await asyncio.to_thread(
+            memory_manager.fetch_recent,
             user,
             k=20,  # default fallback
-            use_time_filtering=(
-                offset == 0 and limit is None
-            ),  # Only apply time filtering for legacy calls without pagination
+            use_time_filtering=use_time_filtering,
             offset=offset,
             limit=limit,
         )
         logger.info(f"Retrieved {len(messages)} messages for user: {user}")
-        return messages
     except Exception as e:
         logger.error(f"Error fetching chat log for user {user}: {str(e)}")
         raise
+
+    if ndjson:
+
+        async def ndjson_lines():
+            for message in messages:
+                yield orjson.dumps(message) + b"\n"
+
+        return StreamingResponse(
+            ndjson_lines(), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+    # fetch_recent already yields role/content/timestamp dicts; response_model
+    # stays for the OpenAPI schema but isn't re-validated per message
+    return Response(
+        orjson.dumps(messages), media_type="application/json", headers=headers
+    )
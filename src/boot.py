@@ -2,29 +2,110 @@
 Application bootstrapping module for the Ted agent.
 
 This module initializes and configures the core components of the Ted application,
-including the LLM client and memory manager. It's responsible for setting up
-the environment and creating the necessary instances for the agent to function.
+including the LLM client and memory manager. Each component is built on first use
+through its accessor, so importing the package (or serving /health) never touches
+OpenAI or Mem0.
 """
 
+import asyncio
+import functools
 import os
 import logging
-from mem0 import MemoryClient
+import threading
 
+import httpx
+
+from src.config import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS
 from src.llm import LLMClient
 from src.memory import MemoryManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# Initialize the LLM client
-llm_client = LLMClient()
 
-# Initialize memory client with environment variable
-mem0_api_key = os.getenv("MEM0_API_KEY")
-if not mem0_api_key:
-    raise ValueError("MEM0_API_KEY environment variable is required")
+def _pooled_http_client(**kwargs) -> httpx.Client:
+    """Keep-alive HTTP/2 client so repeat calls reuse warm connections."""
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=HTTP_MAX_CONNECTIONS,
+        ),
+        **kwargs,
+    )
+
+
+def _pooled_async_http_client(**kwargs) -> httpx.AsyncClient:
+    """Async twin of :func:`_pooled_http_client`; HTTP/2 multiplexes the streams."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections=HTTP_MAX_CONNECTIONS,
+        ),
+        **kwargs,
+    )
+
+
+def _warm_up_llm(llm_client: LLMClient) -> None:
+    """Open the OpenAI TLS session so the first chat turn doesn't pay for it."""
+    try:
+        llm_client.client.models.retrieve(llm_client.model)
+    except Exception as e:
+        logging.debug(f"LLM connection warm-up failed: {e}")
+
+
+async def warm_up_async_llm(llm_client: LLMClient) -> None:
+    """
+    Open the async client's HTTP/2 session; chat streaming and transcription use
+    that pool, which the sync warm-up above doesn't touch. Call on the serving loop.
+    """
+    try:
+        # Bounded so an unreachable API can't hold up startup
+        await asyncio.wait_for(
+            llm_client.aclient.models.retrieve(llm_client.model), timeout=10
+        )
+    except Exception as e:
+        logging.debug(f"Async LLM connection warm-up failed: {e}")
+
+
+@functools.lru_cache(maxsize=1)
+def get_llm_client() -> LLMClient:
+    """Process-wide LLM client; the first call also warms its TLS session."""
+    llm_client = LLMClient(
+        http_client=_pooled_http_client(),
+        async_http_client=_pooled_async_http_client(),
+    )
+    threading.Thread(
+        target=_warm_up_llm, args=(llm_client,), name="ted-warmup", daemon=True
+    ).start()
+    logging.info("LLM client initialized")
+    return llm_client
+
+
+@functools.lru_cache(maxsize=1)
+def get_memory_manager() -> MemoryManager:
+    """Process-wide memory manager backed by Mem0."""
+    # Imported here so workers that never touch Mem0 don't pay for loading it
+    from mem0 import MemoryClient
+
+    mem0_api_key = os.getenv("MEM0_API_KEY")
+    if not mem0_api_key:
+        raise ValueError("MEM0_API_KEY environment variable is required")
+
+    # MemoryClient validates the key on construction, which already opens its pool.
+    # It rewrites base_url/headers on the client it is given, so it gets its own.
+    memory_client = MemoryClient(
+        api_key=mem0_api_key, client=_pooled_http_client(timeout=300)
+    )
+    logging.info("Memory manager initialized")
+    return MemoryManager(memory_client)
 
-memory_client = MemoryClient(api_key=mem0_api_key)
-memory_manager = MemoryManager(memory_client)
 
-logging.info("Application components initialized successfully")
+def __getattr__(name: str):
+    """Keep ``from src.boot import memory_manager, llm_client`` working, lazily."""
+    if name == "memory_manager":
+        return get_memory_manager()
+    if name == "llm_client":
+        return get_llm_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
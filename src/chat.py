@@ -3,59 +3,60 @@ Chat service for managing Ted instances and handling chat interactions.
 """
 
 import asyncio
-import json
+import functools
 import logging
-from typing import AsyncGenerator, Dict
+from typing import AsyncGenerator
 
-from fastapi.responses import StreamingResponse
+import orjson
+from sse_starlette import EventSourceResponse
 
-from .config import DEFAULT_USER_ID
-from .boot import memory_manager, llm_client
+from .config import (
+    DEFAULT_USER_ID,
+    MAX_TED_INSTANCES,
+    SSE_PING_SECONDS,
+    STREAM_BATCH_MS,
+    STREAM_BATCH_TOKENS,
+)
+from .boot import get_llm_client, get_memory_manager
 from .ted import Ted
 from .models import ChatRequest, ChatResponse
 
 logger = logging.getLogger("ted_api.chat")
 
-# Create a dictionary to store Ted instances for different users
-ted_instances: Dict[str, Ted] = {}
-
-# Instantiate default Ted agent
-ted_instances[DEFAULT_USER_ID] = Ted(
-    memory_manager, llm_client, user_id=DEFAULT_USER_ID
-)
-logger.info(f"Initialized Ted instances: {list(ted_instances.keys())}")
-
 
-def sse_format(data: str) -> str:
+def sse_format(data: str) -> bytes:
     """
     Wrap each chunk in JSON so leading spaces survive the SSE parser.
     """
-    return f"data:{json.dumps(data, ensure_ascii=False)}\n\n"
+    return b"data:" + orjson.dumps(data) + b"\n\n"
 
 
-async def stream_response(message: str) -> AsyncGenerator[str, None]:
+_SSE_END = sse_format("[END]")
+
+
+async def stream_response(message: str) -> AsyncGenerator[bytes, None]:
     """
     Simulates streaming a response in chunks for SSE.
     """
-    logger.debug(f"Starting test mode stream for message: {message[:30]}...")
+    logger.debug("Starting test mode stream for message: %.30s...", message)
     response = f"Echo: {message}"
-    for chunk in [response[i : i + 8] for i in range(0, len(response), 8)]:
-        yield sse_format(chunk)
+    for i in range(0, len(response), 8):
+        yield sse_format(response[i : i + 8])
         await asyncio.sleep(0.1)
-    yield sse_format("[END]")
+    yield _SSE_END
     logger.debug("Test mode stream complete")
 
 
+@functools.lru_cache(maxsize=MAX_TED_INSTANCES)
 def get_ted_for_user(user_id: str) -> Ted:
     """
     Returns a Ted instance for the given user_id, creating one if it doesn't exist.
+
+    Instances are memoized per process; the least recently used ones are
+    evicted once MAX_TED_INSTANCES is reached.
     """
-    if user_id not in ted_instances:
-        logger.info(f"Creating new Ted instance for user_id: {user_id}")
-        ted_instances[user_id] = Ted(memory_manager, llm_client, user_id=user_id)
-    else:
-        logger.debug(f"Using existing Ted instance for user_id: {user_id}")
-    return ted_instances[user_id]
+    logger.info("Creating new Ted instance for user_id: %s", user_id)
+    return Ted(get_memory_manager(), get_llm_client(), user_id=user_id)
 
 
 def handle_chat_request(request: ChatRequest) -> ChatResponse:
@@ -63,14 +64,14 @@ def handle_chat_request(request: ChatRequest) -> ChatResponse:
     Handle a simple chat request (non-streaming).
     """
     user_id = request.user_id or DEFAULT_USER_ID
-    logger.info(f"Chat request received from user_id: {user_id}")
+    logger.info("Chat request received from user_id: %s", user_id)
     # For now, just return an echo. In the future, you might want to integrate Ted here too
     return ChatResponse(response=f"Echo: {request.message}")
 
 
 async def handle_chat_stream(
     message: str, user_id: str, test_mode: bool = False
-) -> StreamingResponse:
+) -> EventSourceResponse:
     """
     Handle a streaming chat request.
 
@@ -80,45 +81,64 @@ async def handle_chat_stream(
         test_mode: Whether to use test mode (simple echo)
 
     Returns:
-        StreamingResponse with the chat stream
+        EventSourceResponse with the chat stream
     """
-    logger.info(f"Stream chat request received - user_id: {user_id}")
-    logger.debug(f"Message content ({len(message)} chars): {message[:50]}...")
+    logger.info("Stream chat request received - user_id: %s", user_id)
+    logger.debug("Message content (%d chars): %.50s...", len(message), message)
 
     # Use dummy streaming for testing
     if test_mode:
-        logger.info(f"Using test mode for user_id: {user_id}")
-        return StreamingResponse(
-            stream_response(message), media_type="text/event-stream"
-        )
+        logger.info("Using test mode for user_id: %s", user_id)
+        return EventSourceResponse(stream_response(message), ping=SSE_PING_SECONDS)
     else:
-        logger.info(f"Streaming real chat for user_id: {user_id}")
+        logger.info("Streaming real chat for user_id: %s", user_id)
         # Get or create the Ted for this user
         user_mentor = get_ted_for_user(user_id)
 
         # Use real Ted streaming
         async def mentor_stream():
-            logger.debug(f"Starting ted stream for user_id: {user_id}")
+            logger.debug("Starting ted stream for user_id: %s", user_id)
             token_count = 0
+            loop = asyncio.get_running_loop()
+            batch_window = STREAM_BATCH_MS / 1000
+            # Coalesce tokens into one SSE frame per batch; the client simply
+            # appends each decoded chunk, so frame boundaries don't matter
+            buf: list[str] = []
+            last_flush = loop.time()
             try:
-                for token in user_mentor.stream_reply(message):
+                async for token in user_mentor.astream_reply(message):
                     token_count += 1
-                    yield sse_format(token)
-                    await asyncio.sleep(0)  # let uvicorn flush immediately
+                    buf.append(token)
+                    if (
+                        len(buf) >= STREAM_BATCH_TOKENS
+                        or loop.time() - last_flush > batch_window
+                    ):
+                        yield sse_format("".join(buf))
+                        buf.clear()
+                        last_flush = loop.time()
 
                 logger.info(
-                    f"Stream complete for user_id: {user_id} - sent {token_count} tokens"
+                    "Stream complete for user_id: %s - sent %d tokens",
+                    user_id,
+                    token_count,
                 )
             except Exception as e:
-                logger.error(f"Error during streaming for user_id {user_id}: {str(e)}")
+                logger.error("Error during streaming for user_id %s: %s", user_id, e)
+                if buf:
+                    yield sse_format("".join(buf))
+                    buf.clear()
                 # Send error message to client
                 yield sse_format(f"Error: {str(e)}")
 
-            yield sse_format("[END]")
+            if buf:
+                yield sse_format("".join(buf))
+            yield _SSE_END
 
-        return StreamingResponse(mentor_stream(), media_type="text/event-stream")
+        # Frames are pre-encoded bytes, which EventSourceResponse passes through
+        # untouched; it only adds keep-alive pings and disconnect handling
+        return EventSourceResponse(mentor_stream(), ping=SSE_PING_SECONDS)
 
 
 def get_ted_instances_count() -> int:
     """Get the current number of Ted instances for logging purposes."""
-    return len(ted_instances)
+    return get_ted_for_user.cache_info().currsize
@@ -5,6 +5,7 @@ This module contains all configuration parameters used across the application,
 including LLM settings, memory parameters, and application defaults.
 """
 
+import functools
 import os
 from zoneinfo import ZoneInfo
 from typing import Final
@@ -13,12 +14,17 @@ from typing import Final
 # LLM Configuration
 LLM_MODEL: Final[str] = "gpt-4.1"
 DEFAULT_TEMPERATURE: Final[float] = 0.7
+LLM_TIMEOUT_SECONDS: Final[float] = 60.0
+LLM_CONNECT_TIMEOUT_SECONDS: Final[float] = 5.0
+BATCH_POLL_SECONDS: Final[float] = 30.0  # Batch API status poll interval
+LLM_MAX_RETRIES: Final[int] = 2
 
 # Memory Configuration
-USER_TZ: Final[ZoneInfo] = ZoneInfo("Europe/Berlin")
+USER_TZ_NAME: Final[str] = "Europe/Berlin"
 RECENCY_HALFLIFE_DAYS: Final[int] = 30
 MIN_SIMILARITY_THRESHOLD: Final[float] = 0.45
 DEFAULT_MEMORIES_COUNT: Final[int] = 5
+MAX_MEMORY_CHARS: Final[int] = 4000  # ~1k tokens of memories in the system prompt
 WINDOW_MESSAGES: Final[int] = 20  # number of recent messages to include in context
 
 # Time-based filtering configuration
@@ -32,17 +38,45 @@ TIME_BREAK_THRESHOLD_HOURS: Final[int] = (
     4  # Hours gap that indicates a conversation break
 )
 
+# HTTP Connection Pooling
+HTTP_MAX_CONNECTIONS: Final[int] = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS: Final[int] = 32
+
+# Streaming Configuration
+STREAM_BATCH_MS: Final[int] = 25  # max time tokens wait before an SSE flush
+STREAM_BATCH_TOKENS: Final[int] = 8  # flush early once this many tokens queue up
+COALESCE_MS: Final[int] = 15  # sync chat_stream: max time a delta waits to be yielded
+COALESCE_CHARS: Final[int] = 256  # sync chat_stream: yield early at this much text
+SSE_PING_SECONDS: Final[int] = 15  # keep-alive so proxies don't drop idle streams
+
 # File Paths
-LOG_FILE: Final[str] = "data/chatlog.json"
+LOG_DIR: Final[str] = "data/chatlog"  # one append-only <user_id>.jsonl per user
+LOG_FILE: Final[str] = "data/chatlog.json"  # legacy single-file log, migrated on start
+TAIL_BLOCK_BYTES: Final[int] = 64 * 1024  # backward read size when tailing a log
 
 # Agent Configuration
 DEFAULT_AGENT_ID: Final[str] = "ted"
 DEFAULT_VERSION: Final[str] = "v2"
 
 # Application Defaults
+PRODUCTION: Final[bool] = os.getenv("TED_ENV", "development") == "production"
 DEFAULT_USER_ID: Final[str] = "u42"  # Default user ID for CLI interface
 MAX_THREAD_WORKERS: Final[int] = 2
+MAX_TED_INSTANCES: Final[int] = 1024  # per-process cap on cached Ted agents
 
 # Assistant Profile
 ASSISTANT_NAME: Final[str] = "Ted"
 DEFAULT_USER_NAME: Final[str] = "User"
+
+
+@functools.cache
+def user_tz() -> ZoneInfo:
+    """The user's time zone, loaded from tzdata on first use rather than at import."""
+    return ZoneInfo(USER_TZ_NAME)
+
+
+def __getattr__(name: str):
+    """Keep ``from src.config import USER_TZ`` working without an eager tzdata load."""
+    if name == "USER_TZ":
+        return user_tz()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
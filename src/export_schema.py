@@ -1,8 +1,9 @@
 """
 Defines the schema for exporting Ted memory records to Mem0's /v1/exports endpoint.
-Provides a TedMemory Pydantic model and a JSON schema for export.
+Provides a TedMemory Pydantic model and a lazily built JSON schema for export.
 """
 
+import functools
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, Field
@@ -36,4 +37,14 @@ class TedMemory(BaseModel):
 
 
 # 👉 the dict you pass to `create_memory_export(schema=...)`
-json_schema: Dict[str, Any] = TedMemory.model_json_schema()
+@functools.cache
+def get_json_schema() -> Dict[str, Any]:
+    """JSON schema for TedMemory, generated on first request instead of at import."""
+    return TedMemory.model_json_schema()
+
+
+def __getattr__(name: str):
+    """Keep the old module-level ``json_schema`` name working, lazily."""
+    if name == "json_schema":
+        return get_json_schema()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,18 +2,135 @@
 OpenAI LLM client for Ted. Handles chat completions and streaming responses.
 """
 
+import asyncio
+import functools
 import os
 import logging
-from typing import List, Dict, Any, Iterator
-from openai import OpenAI
-
-from .prompts import SYSTEM_TEMPLATE
-from .config import LLM_MODEL, DEFAULT_TEMPERATURE
-from .utils import get_time_context, detect_conversation_resumption
+import time
+from typing import List, Dict, Any, AsyncIterator, Iterator
+
+import httpx
+import orjson
+from openai import AsyncOpenAI, OpenAI
+
+from .prompts import persona_template, render_prompt
+from .config import (
+    BATCH_POLL_SECONDS,
+    COALESCE_CHARS,
+    COALESCE_MS,
+    LLM_MODEL,
+    DEFAULT_TEMPERATURE,
+    LLM_CONNECT_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_TIMEOUT_SECONDS,
+    MAX_MEMORY_CHARS,
+)
+from .utils import get_time_context, resumption_hint
 
 logger = logging.getLogger("TedLLM")
 
 
+def _sse_delta(line: str) -> str | None:
+    """
+    Content delta carried by one raw SSE line of a chat completion stream.
+
+    Parsing the JSON directly skips the SDK's per-chunk Pydantic models.
+    Returns None for blank lines, ``[DONE]`` and chunks without content.
+    """
+    if not line.startswith("data:"):
+        return None
+    payload = line[5:].lstrip()
+    if payload == "[DONE]":
+        return None
+    chunk = orjson.loads(payload)
+    if "error" in chunk:
+        raise RuntimeError(f"OpenAI stream error: {chunk['error']}")
+    choices = chunk.get("choices")
+    if not choices:
+        return None
+    return choices[0].get("delta", {}).get("content")
+
+
+def _coalesce(
+    tokens: Iterator[str],
+    max_wait_ms: int = COALESCE_MS,
+    max_chars: int = COALESCE_CHARS,
+) -> Iterator[str]:
+    """
+    Join deltas that arrive close together so consumers see fewer, larger chunks.
+
+    A flush happens once ``max_chars`` of text is pending or ``max_wait_ms`` has
+    passed since the last one; whatever is left is yielded when ``tokens`` ends.
+    """
+    max_wait = max_wait_ms / 1000
+    buf: list[str] = []
+    size = 0
+    last_flush = time.monotonic()
+    for token in tokens:
+        buf.append(token)
+        size += len(token)
+        if size >= max_chars or time.monotonic() - last_flush >= max_wait:
+            yield "".join(buf)
+            buf.clear()
+            size = 0
+            last_flush = time.monotonic()
+    if buf:
+        yield "".join(buf)
+
+
+def _fit_memories(mem_text: str, max_chars: int = MAX_MEMORY_CHARS) -> str:
+    """
+    Trim the memory block to whole lines within ``max_chars``.
+
+    Memories arrive best-first, so the tail is what gets dropped; a date header
+    left without any bullets under it is dropped too.
+    """
+    if len(mem_text) <= max_chars:
+        return mem_text
+    kept: list[str] = []
+    size = 0
+    for line in mem_text.splitlines():
+        size += len(line) + 1
+        if size > max_chars:
+            break
+        kept.append(line)
+    while kept and not kept[-1].startswith("  •"):
+        kept.pop()
+    trimmed = "\n".join(kept)
+    logger.info("Trimmed memories from %d to %d chars", len(mem_text), len(trimmed))
+    return trimmed
+
+
+@functools.lru_cache(maxsize=64)
+def _conversation_context(last_timestamp: str | None, minute: int) -> str:
+    """
+    Resumption note for the prompt, recomputed at most once a minute per timestamp.
+
+    ``minute`` only keys the cache: the hint depends on the gap up to now.
+    """
+    is_resumption, hint = resumption_hint(last_timestamp)
+    if is_resumption and hint:
+        return f"<conversation_context>\nNote: This appears to be {hint}. Consider acknowledging this naturally if appropriate.\n</conversation_context>"
+    return ""
+
+
+@functools.lru_cache(maxsize=128)
+def _build_system_prompt(
+    mem_text: str,
+    assistant_name: str,
+    user_name: str,
+    time_context: str,
+    conversation_context: str,
+) -> str:
+    """Render the system prompt; identical inputs within a minute reuse the string."""
+    return render_prompt(
+        persona_template(assistant_name, user_name),
+        memories=mem_text or "[no relevant memories found]",
+        time_context=time_context,
+        conversation_context=conversation_context,
+    )
+
+
 class LLMClient:
     """
     OpenAI LLM client wrapper that handles chat completions for the Ted agent.
@@ -24,6 +141,7 @@ class LLMClient:
 
     Attributes:
         client (OpenAI): The OpenAI client instance.
+        aclient (AsyncOpenAI): The async OpenAI client used by the streaming API.
         model (str): The model name to use for completions.
         temperature (float): The temperature setting for response generation.
     """
@@ -33,6 +151,8 @@ class LLMClient:
         api_key: str | None = None,
         model: str = LLM_MODEL,
         temperature: float = DEFAULT_TEMPERATURE,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
     ):
         """
         Initialize the LLM client.
@@ -41,14 +161,29 @@ class LLMClient:
             api_key (str | None, optional): OpenAI API key. If None, will use environment variable.
             model (str, optional): Model name. Defaults to LLM_MODEL.
             temperature (float, optional): Temperature for response generation. Defaults to DEFAULT_TEMPERATURE.
+            http_client (httpx.Client | None, optional): Pre-configured HTTP client (pool limits, HTTP/2). Defaults to the SDK's own.
+            async_http_client (httpx.AsyncClient | None, optional): Pre-configured async HTTP client for ``aclient``. Defaults to the SDK's own.
         """
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        # Both clients share the same timeout/retry policy; each keeps its own pool.
+        # Connects fail fast on an unreachable host; reads get the full budget.
+        timeout = httpx.Timeout(
+            LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS
+        )
+        options = dict(api_key=api_key, timeout=timeout, max_retries=LLM_MAX_RETRIES)
+        self.client = OpenAI(http_client=http_client, **options)
+        self.aclient = AsyncOpenAI(http_client=async_http_client, **options)
         self.model = model
         self.temperature = temperature
         logger.info(
             f"Initialized LLM client with model={model}, temperature={temperature}"
         )
 
+    async def aclose(self) -> None:
+        """Close both clients' connection pools."""
+        self.client.close()
+        await self.aclient.close()
+
     def _format_system_prompt(
         self,
         mem_text: str,
@@ -73,20 +208,43 @@ class LLMClient:
 
         # Detect conversation resumption and build context
         conversation_context = ""
-        if thread and len(thread) > 0:
-            is_resumption, resumption_hint = detect_conversation_resumption(thread)
-            if is_resumption and resumption_hint:
-                conversation_context = f"<conversation_context>\nNote: This appears to be {resumption_hint}. Consider acknowledging this naturally if appropriate.\n</conversation_context>"
+        if thread and len(thread) > 1:
+            conversation_context = _conversation_context(
+                thread[-1].get("timestamp"), int(time.time()) // 60
+            )
 
         # Format the complete system prompt
-        return SYSTEM_TEMPLATE.format(
-            assistant_name=assistant_name,
-            user_name=user_name,
-            memories=mem_text or "[no relevant memories found]",
-            time_context=time_context,
-            conversation_context=conversation_context,
+        return _build_system_prompt(
+            _fit_memories(mem_text),
+            assistant_name,
+            user_name,
+            time_context,
+            conversation_context,
         )
 
+    def _build_messages(
+        self,
+        user_msg: str,
+        mem_text: str,
+        assistant_name: str,
+        user_name: str,
+        thread: List[Dict[str, str]] | None,
+    ) -> List[Dict[str, str]]:
+        """
+        Assemble the system prompt, recent thread and current user message.
+
+        Returns:
+            List[Dict[str, str]]: Messages ready for the chat completions API.
+        """
+        system = {
+            "role": "system",
+            "content": self._format_system_prompt(
+                mem_text, assistant_name, user_name, thread
+            ),
+        }
+        # One list display sized up front: system, thread (if any), current user turn
+        return [system, *(thread or ()), {"role": "user", "content": user_msg}]
+
     def chat(
         self,
         user_msg: str,
@@ -108,26 +266,13 @@ class LLMClient:
         Returns:
             str: The assistant's response.
         """
-        logger.info(f"Generating chat completion for user message: {user_msg[:50]}...")
-
-        # Build the message sequence
-        messages = [
-            {
-                "role": "system",
-                "content": self._format_system_prompt(
-                    mem_text, assistant_name, user_name, thread
-                ),
-            }
-        ]
+        logger.info("Generating chat completion for user message: %.50s...", user_msg)
 
-        # Add thread messages if provided
-        if thread:
-            messages.extend(thread)
-
-        # Add the current user message
-        messages.append({"role": "user", "content": user_msg})
+        messages = self._build_messages(
+            user_msg, mem_text, assistant_name, user_name, thread
+        )
 
-        logger.debug(f"Sending {len(messages)} messages to OpenAI API")
+        logger.debug("Sending %d messages to OpenAI API", len(messages))
 
         try:
             response = self.client.chat.completions.create(
@@ -137,11 +282,11 @@ class LLMClient:
             )
 
             reply = response.choices[0].message.content
-            logger.info(f"Received completion: {len(reply)} characters")
+            logger.info("Received completion: %d characters", len(reply))
             return reply
 
         except Exception as e:
-            logger.error(f"Error in chat completion: {str(e)}")
+            logger.error("Error in chat completion: %s", e)
             raise
 
     def chat_stream(
@@ -163,48 +308,228 @@ class LLMClient:
             thread (List[Dict[str, str]] | None, optional): Recent message history. Defaults to None.
 
         Yields:
-            str: Each token in the assistant's response.
+            str: The assistant's response, with deltas that arrive within
+            COALESCE_MS of each other joined into one chunk.
         """
         logger.info(
-            f"Starting streaming completion for user message: {user_msg[:50]}..."
+            "Starting streaming completion for user message: %.50s...", user_msg
         )
 
-        # Build the message sequence
-        messages = [
-            {
-                "role": "system",
-                "content": self._format_system_prompt(
-                    mem_text, assistant_name, user_name, thread
-                ),
-            }
-        ]
+        messages = self._build_messages(
+            user_msg, mem_text, assistant_name, user_name, thread
+        )
 
-        # Add thread messages if provided
-        if thread:
-            messages.extend(thread)
+        logger.debug("Streaming %d messages to OpenAI API", len(messages))
 
-        # Add the current user message
-        messages.append({"role": "user", "content": user_msg})
+        try:
+            token_count = 0
 
-        logger.debug(f"Streaming {len(messages)} messages to OpenAI API")
+            def deltas(lines: Iterator[str]) -> Iterator[str]:
+                nonlocal token_count
+                for line in lines:
+                    if (token := _sse_delta(line)) is not None:
+                        token_count += 1
+                        yield token
 
-        try:
-            stream = self.client.chat.completions.create(
+            with self.client.chat.completions.with_streaming_response.create(
                 model=self.model,
                 messages=messages,
                 temperature=self.temperature,
                 stream=True,
+            ) as response:
+                yield from _coalesce(deltas(response.iter_lines()))
+
+            logger.info("Streaming completed: %d tokens", token_count)
+
+        except Exception as e:
+            logger.error("Error in streaming completion: %s", e)
+            raise
+
+    def chat_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        poll_seconds: float = BATCH_POLL_SECONDS,
+    ) -> List[str | None]:
+        """
+        Run many non-interactive completions through OpenAI's Batch API.
+
+        Batches cost half as much and draw on a separate rate limit, at the price
+        of latency (up to 24h), so this is for evals and offline jobs only.
+
+        Args:
+            requests (List[Dict[str, Any]]): One dict per completion holding the
+                keyword arguments of :meth:`chat` (``user_msg`` is required).
+            poll_seconds (float, optional): Delay between status checks. Defaults to BATCH_POLL_SECONDS.
+
+        Returns:
+            List[str | None]: Replies in request order; None where a request failed.
+
+        Raises:
+            RuntimeError: If the batch ends in any state other than completed.
+        """
+        lines = []
+        for i, req in enumerate(requests):
+            messages = self._build_messages(
+                req["user_msg"],
+                req.get("mem_text", ""),
+                req.get("assistant_name", "Ted"),
+                req.get("user_name", "User"),
+                req.get("thread"),
+            )
+            lines.append(
+                orjson.dumps(
+                    {
+                        "custom_id": str(i),
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": self.model,
+                            "messages": messages,
+                            "temperature": self.temperature,
+                        },
+                    },
+                    option=orjson.OPT_APPEND_NEWLINE,
+                )
             )
 
+        batch_file = self.client.files.create(
+            file=("batch.jsonl", b"".join(lines)), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info("Submitted batch %s with %d requests", batch.id, len(requests))
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(poll_seconds)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+        replies: List[str | None] = [None] * len(requests)
+        if batch.output_file_id:
+            output = self.client.files.content(batch.output_file_id).content
+            for line in output.splitlines():
+                result = orjson.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") == 200:
+                    message = response["body"]["choices"][0]["message"]
+                    replies[int(result["custom_id"])] = message["content"]
+        logger.info(
+            "Batch %s finished: %d/%d succeeded",
+            batch.id,
+            sum(r is not None for r in replies),
+            len(requests),
+        )
+        return replies
+
+    async def achat(
+        self,
+        user_msg: str,
+        mem_text: str = "",
+        assistant_name: str = "Ted",
+        user_name: str = "User",
+        thread: List[Dict[str, str]] | None = None,
+    ) -> str:
+        """
+        Async variant of :meth:`chat`; awaits the completion on ``aclient``.
+
+        Args:
+            user_msg (str): The user's message.
+            mem_text (str, optional): Memory context. Defaults to "".
+            assistant_name (str, optional): Assistant's name. Defaults to "Ted".
+            user_name (str, optional): User's name. Defaults to "User".
+            thread (List[Dict[str, str]] | None, optional): Recent message history. Defaults to None.
+
+        Returns:
+            str: The assistant's response.
+        """
+        logger.info(
+            "Generating async chat completion for user message: %.50s...", user_msg
+        )
+
+        messages = self._build_messages(
+            user_msg, mem_text, assistant_name, user_name, thread
+        )
+
+        logger.debug("Sending %d messages to OpenAI API", len(messages))
+
+        try:
+            response = await self.aclient.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+            )
+
+            reply = response.choices[0].message.content
+            logger.info("Received async completion: %d characters", len(reply))
+            return reply
+
+        except Exception as e:
+            logger.error("Error in async chat completion: %s", e)
+            raise
+
+    async def achat_many(self, requests: List[Dict[str, Any]]) -> List[str]:
+        """
+        Run several independent completions concurrently over the shared pool.
+
+        Args:
+            requests (List[Dict[str, Any]]): One dict per completion holding the
+                keyword arguments of :meth:`achat` (``user_msg`` is required).
+
+        Returns:
+            List[str]: Replies in request order.
+        """
+        return await asyncio.gather(*(self.achat(**req) for req in requests))
+
+    async def achat_stream(
+        self,
+        user_msg: str,
+        mem_text: str = "",
+        assistant_name: str = "Ted",
+        user_name: str = "User",
+        thread: List[Dict[str, str]] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of :meth:`chat_stream` that never blocks the event loop.
+
+        Args:
+            user_msg (str): The user's message.
+            mem_text (str, optional): Memory context. Defaults to "".
+            assistant_name (str, optional): Assistant's name. Defaults to "Ted".
+            user_name (str, optional): User's name. Defaults to "User".
+            thread (List[Dict[str, str]] | None, optional): Recent message history. Defaults to None.
+
+        Yields:
+            str: Each token in the assistant's response.
+        """
+        logger.info(
+            "Starting async streaming completion for user message: %.50s...", user_msg
+        )
+
+        messages = self._build_messages(
+            user_msg, mem_text, assistant_name, user_name, thread
+        )
+
+        logger.debug("Streaming %d messages to OpenAI API", len(messages))
+
+        try:
             token_count = 0
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    token = chunk.choices[0].delta.content
-                    token_count += 1
-                    yield token
+            async with self.aclient.chat.completions.with_streaming_response.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                stream=True,
+            ) as response:
+                async for line in response.iter_lines():
+                    if (token := _sse_delta(line)) is not None:
+                        token_count += 1
+                        yield token
 
-            logger.info(f"Streaming completed: {token_count} tokens")
+            logger.info("Async streaming completed: %d tokens", token_count)
 
         except Exception as e:
-            logger.error(f"Error in streaming completion: {str(e)}")
+            logger.error("Error in async streaming completion: %s", e)
             raise
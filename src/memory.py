@@ -3,31 +3,180 @@ Encapsulates memory retrieval, storage, and thread management logic for the Ted
 Provides a MemoryManager class for handling user memories and conversations.
 """
 
-from mem0 import MemoryClient
-from collections import OrderedDict
 from datetime import UTC, datetime, timezone
+import functools
+import heapq
+import math
 import re
 import logging
-from typing import Any, Optional, List, Dict
-import json
+from operator import itemgetter
+from typing import TYPE_CHECKING, Optional, List, Dict
+from urllib.parse import quote
+import fcntl
+import orjson
 import os
-from threading import Lock
 
 from src.config import (
-    USER_TZ,
+    user_tz,
     RECENCY_HALFLIFE_DAYS,
     MIN_SIMILARITY_THRESHOLD,
     WINDOW_MESSAGES,
+    LOG_DIR,
     LOG_FILE,
+    TAIL_BLOCK_BYTES,
 )
 from src.utils import filter_messages_by_time_gaps
 
+if TYPE_CHECKING:
+    # mem0 drags in a large dependency tree; only boot needs it at runtime
+    from mem0 import MemoryClient
+
 _DUPLICATE_REGEX = re.compile(r"\W+")
-_log_lock = Lock()
 
 logger = logging.getLogger("TedMemory")
 
 
+@functools.lru_cache(maxsize=4096)
+def _memory_signature(memory_text: str) -> str:
+    """Normalized text used to spot duplicate memories; Mem0 repeats top hits."""
+    return _DUPLICATE_REGEX.sub("", memory_text.lower())
+
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+@functools.lru_cache(maxsize=2048)
+def _local_date_and_time(epoch_minute: int) -> tuple[str, str]:
+    """``(date header, HH:MM)`` in the user's timezone for a UTC epoch minute."""
+    local_ts = datetime.fromtimestamp(epoch_minute * 60, tz=user_tz())
+    # Same as strftime("%Y-%m-%d (%a)") / ("%H:%M"), minus the format parsing
+    # and the locale lookup for the day name
+    return (
+        f"{local_ts.year:04d}-{local_ts.month:02d}-{local_ts.day:02d}"
+        f" ({_WEEKDAYS[local_ts.weekday()]})",
+        f"{local_ts.hour:02d}:{local_ts.minute:02d}",
+    )
+
+
+def _hit_timestamp(hit: dict, default: datetime) -> datetime:
+    """When a Mem0 hit was recorded (our ``ts`` metadata, else ``created_at``)."""
+    ts_iso = hit.get("metadata", {}).get("ts") or hit["created_at"]
+    try:
+        ts = datetime.fromisoformat(ts_iso.replace("Z", "+00:00"))
+    except Exception:
+        return default
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _user_log_path(user_id: str) -> str:
+    """Path of the append-only JSONL log for ``user_id`` (safe for any id)."""
+    return os.path.join(LOG_DIR, f"{quote(user_id, safe='')}.jsonl")
+
+
+def _tail_records(path: str, n: int) -> List[dict]:
+    """
+    Return the last ``n`` readable records of ``path``, reading backwards in
+    TAIL_BLOCK_BYTES blocks so the cost is independent of the log's length.
+
+    Unreadable lines (e.g. one torn by a crashed append) are skipped and don't
+    count towards ``n``; reading continues until ``n`` records or the start.
+    """
+    if n <= 0:
+        return []
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    records: List[dict] = []  # newest first
+    with f:
+        # Appends take LOCK_EX, so a shared lock never sees a half-written line
+        fcntl.flock(f, fcntl.LOCK_SH)
+        pos = f.seek(0, os.SEEK_END)
+        carry = b""  # start of the earliest line read so far, not yet complete
+        at_tail = True
+        while pos > 0 and len(records) < n:
+            step = min(TAIL_BLOCK_BYTES, pos)
+            pos -= step
+            f.seek(pos)
+            region = f.read(step) + carry
+            if at_tail:
+                # whatever follows the final newline is not a complete line
+                cut = region.rfind(b"\n")
+                if cut < 0:
+                    carry = b""
+                    continue
+                region = region[:cut]
+                at_tail = False
+            lines = region.split(b"\n")
+            # the block boundary may have cut the first line; finish it next round
+            carry = lines.pop(0) if pos > 0 else b""
+            for line in reversed(lines):
+                if not line:
+                    continue
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    logger.warning("Skipping unreadable chat log line")
+                    continue
+                if len(records) == n:
+                    break
+    records.reverse()
+    return records
+
+
+def _recent_messages(path: str, n: int) -> tuple[dict, ...]:
+    """
+    Last ``n`` messages of the log at ``path``.
+
+    Served from memory while the file's mtime and size are unchanged, so
+    repeated reads of an idle log (polling, back-to-back turns) cost one stat.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return ()
+    return _read_recent(path, st.st_mtime_ns, st.st_size, n)
+
+
+@functools.lru_cache(maxsize=256)
+def _read_recent(path: str, mtime_ns: int, size: int, n: int) -> tuple[dict, ...]:
+    # mtime_ns and size only key the cache; every append changes them
+    return tuple(_tail_records(path, n))
+
+
+def _migrate_legacy_log() -> None:
+    """
+    Split the old single-file ``LOG_FILE`` into per-user JSONL logs, once.
+
+    Guarded by ``flock`` so only one worker process does the work; the old
+    file is kept as ``<LOG_FILE>.migrated``.
+    """
+    if not os.path.exists(LOG_FILE):
+        return
+    with open(f"{LOG_FILE}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if not os.path.exists(LOG_FILE):
+            return  # another worker got here first
+        with open(LOG_FILE, "rb") as f:
+            try:
+                data = orjson.loads(f.read())
+            except orjson.JSONDecodeError:
+                data = {}
+        for user_id, messages in data.items():
+            # Written aside and renamed in, so an interrupted migration reruns
+            # cleanly instead of appending the same messages twice
+            path = _user_log_path(user_id)
+            with open(f"{path}.tmp", "wb") as out:
+                out.write(b"".join(orjson.dumps(m) + b"\n" for m in messages))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(f"{path}.tmp", path)
+        os.replace(LOG_FILE, f"{LOG_FILE}.migrated")
+        logger.info(f"Migrated chat log for {len(data)} users to {LOG_DIR}/")
+
+
 class MemoryManager:
     """
     Handles retrieval and storage of user memories, as well as thread management.
@@ -36,7 +185,9 @@ class MemoryManager:
         memory (MemoryClient): The underlying memory client for storage and retrieval.
     """
 
-    def __init__(self, memory_client: MemoryClient):
+    __slots__ = ("memory",)
+
+    def __init__(self, memory_client: "MemoryClient"):
         """
         Initialize the MemoryManager.
 
@@ -44,6 +195,8 @@ class MemoryManager:
             memory_client (MemoryClient): The memory client instance to use for storage and retrieval.
         """
         self.memory = memory_client
+        os.makedirs(LOG_DIR, exist_ok=True)
+        _migrate_legacy_log()
 
     def retrieve(
         self, query: str, user_id: str, k: Optional[int] = 5, version: str = "v2"
@@ -64,8 +217,13 @@ class MemoryManager:
         if not query:
             logger.debug("Blank query – skipping memory retrieval")
             return ""
+        if not k or k <= 0:
+            logger.debug("k=%s – skipping memory retrieval", k)
+            return ""
 
-        logger.info(f"Retrieving memories for query: {query!r} and user_id: {user_id}")
+        logger.info(
+            "Retrieving memories for query: %.50r and user_id: %s", query, user_id
+        )
 
         # For v2, we need to use proper filters structure as per documentation
         if version == "v2":
@@ -93,42 +251,44 @@ class MemoryManager:
                 top_k=k * 3,
             )
 
-        logger.info(f"Retrieved {len(raw_hits)} raw hits from memory search")
+        logger.info("Retrieved %d raw hits from memory search", len(raw_hits))
         now_utc = datetime.now(timezone.utc)
-
-        def score(hit: dict) -> float:
+        now_epoch = now_utc.timestamp()
+        # 0.5 ** (age / half-life) as a single exp() call per hit
+        decay_per_day = -math.log(2) / RECENCY_HALFLIFE_DAYS
+
+        # Score every hit, parsing its timestamp at most once; ranking and
+        # formatting both use it. Below-threshold hits score 0 whatever their
+        # age, so theirs is only parsed if one of them actually gets picked.
+        # Duplicates collapse onto their best-scoring copy, the earliest hit
+        # winning ties, exactly as a stable rank-then-dedup would pick them.
+        best: dict[str, tuple[float, int, Optional[datetime], dict]] = {}
+        for i, hit in enumerate(raw_hits):
+            sig = _memory_signature(hit["memory"])
+            if not sig:
+                continue
             sim = hit["score"]
             if sim < MIN_SIMILARITY_THRESHOLD:
-                return 0.0
-            ts_iso = hit.get("metadata", {}).get("ts") or hit["created_at"]
-            try:
-                ts = datetime.fromisoformat(ts_iso.replace("Z", "+00:00"))
-                if ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-            except Exception:
-                ts = now_utc
-            age_days = (now_utc - ts.astimezone(timezone.utc)).days
-            recency = 0.5 ** (age_days / RECENCY_HALFLIFE_DAYS)
-            return sim * recency
-
-        ranked = sorted(raw_hits, key=score, reverse=True)
-        picked: "OrderedDict[str, dict]" = OrderedDict()
-        for hit in ranked:
-            if len(picked) >= k:
-                break
-            sig = _DUPLICATE_REGEX.sub("", hit["memory"].lower())
-            if sig and sig not in picked:
-                picked[sig] = hit
-
-        grouped: "OrderedDict[str, list[tuple[str,str]]]" = OrderedDict()
-        for hit in picked.values():
-            ts_iso = hit.get("metadata", {}).get("ts") or hit["created_at"]
-            ts = datetime.fromisoformat(ts_iso.replace("Z", "+00:00"))
-            if ts.tzinfo is None:
-                ts = ts.replace(tzinfo=timezone.utc)
-            local_ts = ts.astimezone(USER_TZ)
-            date_hdr = local_ts.strftime("%Y-%m-%d (%a)")
-            time_str = local_ts.strftime("%H:%M")
+                entry = (0.0, -i, None, hit)
+            else:
+                ts = _hit_timestamp(hit, now_utc)
+                age_days = (now_epoch - ts.timestamp()) // 86400  # whole days
+                recency = math.exp(age_days * decay_per_day)
+                entry = (sim * recency, -i, ts, hit)
+            prev = best.get(sig)
+            if prev is None or entry[0] > prev[0]:
+                best[sig] = entry
+
+        # Candidates are already distinct, so a partial top-k selection (score
+        # first, then Mem0's order) is all the ranking needed
+        picked = heapq.nlargest(k, best.values(), key=itemgetter(0, 1))
+
+        grouped: dict[str, list[tuple[str, str]]] = {}
+        for _, _, ts, hit in picked:
+            if ts is None:
+                ts = _hit_timestamp(hit, now_utc)
+            # Memories from the same minute share one tz conversion
+            date_hdr, time_str = _local_date_and_time(int(ts.timestamp()) // 60)
             grouped.setdefault(date_hdr, []).append((time_str, hit["memory"].strip()))
 
         lines: list[str] = []
@@ -152,7 +312,9 @@ class MemoryManager:
             agent_id (str): The agent identifier.
         """
         logger.info(
-            f"Storing conversation to memory for user_id: {user_id}, agent_id: {agent_id}"
+            "Storing conversation to memory for user_id: %s, agent_id: %s",
+            user_id,
+            agent_id,
         )
 
         try:
@@ -171,20 +333,20 @@ class MemoryManager:
             raise
 
     # ──────────────────────────────────────────────────────────
-    #  Single-log storage  (one list per user_id)              │
+    #  Chat-log storage  (one append-only JSONL file per user) │
     # ──────────────────────────────────────────────────────────
-    def _load_log(self) -> dict:
-        if not os.path.exists(LOG_FILE):
-            return {}
-        with _log_lock, open(LOG_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except Exception:
-                return {}
+    def log_version(self, user_id: str) -> str:
+        """
+        Cheap fingerprint of a user's chat log that changes on every append.
 
-    def _save_log(self, data: dict) -> None:
-        with _log_lock, open(LOG_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        Derived from the file's mtime and size, so writes from any process
+        (API or Streamlit) are picked up without reading the log.
+        """
+        try:
+            st = os.stat(_user_log_path(user_id))
+        except FileNotFoundError:
+            return "0"
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
 
     def append_message(
         self,
@@ -193,19 +355,46 @@ class MemoryManager:
         content: str,
         ts: Optional[str] = None,
     ) -> None:
-        """Store one message in the single-user log."""
-        logger.info(f"Appending message for user_id: {user_id}, role: {role}")
-        data = self._load_log()
-        data.setdefault(user_id, []).append(
-            {
-                "role": role,
-                "content": content,
-                "timestamp": ts or datetime.now(UTC).isoformat(),
-            }
+        """Append one message to the user's log; O(1) in the log's size."""
+        logger.info("Appending message for user_id: %s, role: %s", user_id, role)
+        self.append_messages(
+            user_id, [{"role": role, "content": content, "timestamp": ts}]
+        )
+
+    def append_messages(self, user_id: str, messages: List[Dict[str, str]]) -> None:
+        """
+        Append several messages to the user's log in a single locked write.
+
+        Args:
+            user_id: The user identifier
+            messages: Dicts with ``role`` and ``content``; a missing ``timestamp``
+                defaults to now
+        """
+        now = datetime.now(UTC).isoformat()
+        data = b"".join(
+            orjson.dumps(
+                {
+                    "role": msg["role"],
+                    "content": msg["content"],
+                    "timestamp": msg.get("timestamp") or now,
+                }
+            )
+            + b"\n"
+            for msg in messages
+        )
+        # Unbuffered, so the whole batch lands in one write() while locked;
+        # readable too, for the torn-line check below
+        with open(_user_log_path(user_id), "a+b", buffering=0) as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            # A crash mid-append leaves a torn last line; start on a fresh line
+            # so it stays one skippable record instead of swallowing this one
+            size = os.fstat(f.fileno()).st_size
+            if size and os.pread(f.fileno(), 1, size - 1) != b"\n":
+                data = b"\n" + data
+            f.write(data)
+        logger.debug(
+            "Appended %d messages successfully for user_id: %s", len(messages), user_id
         )
-        # keep everything; we'll slice later
-        self._save_log(data)
-        logger.debug(f"Message appended successfully for user_id: {user_id}")
 
     def fetch_recent(
         self,
@@ -229,55 +418,69 @@ class MemoryManager:
         actual_limit = limit if limit is not None else k
 
         logger.info(
-            f"Fetching recent messages for user_id: {user_id}, k={k}, offset={offset}, "
-            f"limit={actual_limit}, time_filtering={use_time_filtering}"
+            "Fetching recent messages for user_id: %s, k=%s, offset=%s, "
+            "limit=%s, time_filtering=%s",
+            user_id,
+            k,
+            offset,
+            actual_limit,
+            use_time_filtering,
         )
-        data = self._load_log()
-        messages = data.get(user_id, [])
+        # For pagination, we slice from the end backwards: only the last
+        # offset + limit lines are read, then the newest `offset` are dropped
+        messages = _recent_messages(_user_log_path(user_id), offset + actual_limit)
 
         if not messages:
-            logger.info(f"No messages found for user_id: {user_id}")
+            logger.info("No messages found for user_id: %s", user_id)
             return []
 
-        # When using pagination (offset > 0), we want to get older messages
-        # Calculate the slice indices for pagination
-        total_messages = len(messages)
-
-        if offset >= total_messages:
+        if offset >= len(messages):
             logger.info(
-                f"Offset {offset} >= total messages {total_messages}, returning empty"
+                "Offset %d >= total messages %d, returning empty", offset, len(messages)
             )
             return []
 
-        # For pagination, we slice from the end backwards
-        start_index = max(0, total_messages - offset - actual_limit)
-        end_index = total_messages - offset
-
         # Get the requested slice
-        raw_messages = messages[start_index:end_index]
+        raw_messages = messages[: len(messages) - offset]
 
         # Apply time-based filtering if enabled and not using pagination
         # When using pagination, we typically want all messages in the range
         if use_time_filtering and offset == 0:
-            filtered_messages = filter_messages_by_time_gaps(raw_messages)
+            # Already returns fresh role/content/timestamp dicts
+            result = filter_messages_by_time_gaps(raw_messages)
             logger.info(
-                f"Time filtering: {len(raw_messages)} -> {len(filtered_messages)} messages"
-            )
-        else:
-            filtered_messages = raw_messages
-            logger.info(
-                f"No time filtering applied, using {len(filtered_messages)} messages"
+                "Time filtering: %d -> %d messages", len(raw_messages), len(result)
             )
+            return result
+
+        logger.info("No time filtering applied, using %d messages", len(raw_messages))
+        # Log records are stored in the returned shape; only pre-JSONL entries
+        # can lack a timestamp. Records are shared with the read cache, so
+        # callers must treat them as read-only.
+        now = None
+        result = []
+        for msg in raw_messages:
+            if "timestamp" not in msg:
+                now = now or datetime.now(UTC).isoformat()
+                msg = {**msg, "timestamp": now}
+            result.append(msg)
+        return result
 
-        result = [
-            {
-                "role": msg["role"],
-                "content": msg["content"],
-                "timestamp": msg.get("timestamp", datetime.now(UTC).isoformat()),
-            }
-            for msg in filtered_messages
+    def fetch_recent_for_llm(
+        self, user_id: str, k: int = WINDOW_MESSAGES
+    ) -> List[Dict[str, str]]:
+        """
+        Time-filtered recent messages as ``{role, content}`` chat turns.
+
+        Args:
+            user_id: The user identifier
+            k: Maximum number of messages to consider
+        """
+        # The time filter still needs the timestamps; only the result drops them
+        return [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in self.fetch_recent(user_id, k, use_time_filtering=True)
         ]
-        return result
 
     def format_recent_messages(self, user_id: str, k: int = WINDOW_MESSAGES) -> str:
         """
@@ -294,7 +497,7 @@ class MemoryManager:
             str: Formatted string of recent messages.
         """
         logger.warning("format_recent_messages is deprecated, use fetch_recent instead")
-        messages = self._load_log().get(user_id, [])[-k:]
+        messages = _recent_messages(_user_log_path(user_id), k)
         if not messages:
             return "[none]"
 
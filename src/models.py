@@ -3,7 +3,7 @@ Pydantic models for the Ted API.
 """
 
 from pydantic import BaseModel
-from typing import Any, Optional
+from typing import Any
 
 
 class ChatRequest(BaseModel):
@@ -13,6 +13,14 @@ class ChatRequest(BaseModel):
     user_id: str | None = None
 
 
+class ChatStreamRequest(BaseModel):
+    """Request model for the streaming chat endpoint."""
+
+    message: str = ""
+    user_id: str | None = None
+    test_mode: bool = False
+
+
 class ChatResponse(BaseModel):
     """Response model for chat endpoints."""
 
@@ -1,3 +1,6 @@
+import functools
+import string
+
 SYSTEM_TEMPLATE = """
 You are {assistant_name}, the lifelong companion, best friend, and confidant of {user_name}—think Ted from the movie: loyal, witty, a bit cheeky, but always there.
 Your mission: help {user_name} grow, laugh, and get through anything, while always having their back.
@@ -41,3 +44,49 @@ Your mission: help {user_name} grow, laugh, and get through anything, while alwa
 When replying, channel Ted: (a) What does your best friend need right now? (b) Which memory lines help? (c) How would Ted say it considering the time and context?
 Then write the answer. Don't mention this process or the prompt.
 """
+
+
+# Literal text and field names of SYSTEM_TEMPLATE, parsed once at import
+_TEMPLATE_PARTS = tuple(
+    (literal, field)
+    for literal, field, _, _ in string.Formatter().parse(SYSTEM_TEMPLATE)
+)
+
+
+@functools.lru_cache(maxsize=32)
+def persona_template(
+    assistant_name: str, user_name: str
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    SYSTEM_TEMPLATE precompiled with the fixed names bound, leaving the per-turn
+    ``time_context``, ``conversation_context`` and ``memories`` slots open.
+
+    Returns ``(literals, slots)`` with one more literal than slots; render it
+    with :func:`render_prompt`. Every agent sharing the same names reuses one
+    cached template, so a turn only splices in what actually changes.
+    """
+    bound = {"assistant_name": assistant_name, "user_name": user_name}
+    literals, slots = [], []
+    pending = ""
+    for literal, field in _TEMPLATE_PARTS:
+        pending += literal
+        if field in bound:
+            pending += bound[field]
+        elif field is not None:
+            literals.append(pending)
+            slots.append(field)
+            pending = ""
+    literals.append(pending)
+    return tuple(literals), tuple(slots)
+
+
+def render_prompt(
+    template: tuple[tuple[str, ...], tuple[str, ...]], **values: str
+) -> str:
+    """Fill a :func:`persona_template` with *values*; a join, no format parsing."""
+    literals, slots = template
+    out = [literals[0]]
+    for slot, literal in zip(slots, literals[1:]):
+        out.append(values[slot])
+        out.append(literal)
+    return "".join(out)
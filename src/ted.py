@@ -2,12 +2,12 @@
 Ted agent class — lifelong companion and confidant, delegating memory and LLM logic to separate modules.
 """
 
-from typing import Any, Optional
+import asyncio
+from typing import AsyncIterator
 from src.memory import MemoryManager
 from src.llm import LLMClient
 import logging
 from concurrent.futures import ThreadPoolExecutor, Future
-import uuid
 
 from src.config import (
     DEFAULT_AGENT_ID,
@@ -22,14 +22,42 @@ logger = logging.getLogger("TedAgent")
 _EXECUTOR = ThreadPoolExecutor(
     max_workers=MAX_THREAD_WORKERS, thread_name_prefix="ted-bg"
 )
+# Separate from _EXECUTOR so a turn's Mem0 search never queues behind the
+# (slower) background memory.store() calls of earlier turns
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MAX_THREAD_WORKERS, thread_name_prefix="ted-prefetch"
+)
+
+
+# Async path: post-reply writes run as event-loop tasks, memory.store() at most
+# MAX_THREAD_WORKERS at a time; the set keeps pending tasks referenced
+_STORE_SLOTS = asyncio.Semaphore(MAX_THREAD_WORKERS)
+_BACKGROUND_TASKS: "set[asyncio.Task]" = set()
 
 
-def _log_when_done(fut: Future) -> None:
-    """Log exceptions from background memory.store() calls."""
+def _log_when_done(fut: "Future | asyncio.Task") -> None:
+    """Log exceptions from background memory writes."""
+    if fut.cancelled():
+        return  # e.g. tasks torn down at shutdown; nothing failed
     try:
         fut.result()
     except Exception as e:
-        logger.exception("Background memory.store() failed: %s", e)
+        logger.exception("Background memory write failed: %s", e)
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Run *coro* as a tracked background task whose failures get logged."""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    task.add_done_callback(_log_when_done)
+    return task
+
+
+async def drain_background_tasks() -> None:
+    """Wait for pending async memory writes, e.g. before shutdown."""
+    if _BACKGROUND_TASKS:
+        await asyncio.gather(*_BACKGROUND_TASKS, return_exceptions=True)
 
 
 class Ted:
@@ -47,6 +75,18 @@ class Ted:
         user_name (str): Name of the user.
     """
 
+    # One Ted is cached per active user, so skip the per-instance __dict__
+    __slots__ = (
+        "memory",
+        "llm",
+        "user_id",
+        "agent_id",
+        "k",
+        "version",
+        "assistant_name",
+        "user_name",
+    )
+
     def __init__(
         self,
         memory: MemoryManager,
@@ -102,18 +142,14 @@ class Ted:
         Returns:
             str: The assistant's reply.
         """
-        logger.info(f"Received user message: {user_msg}")
+        logger.info("Received user message: %.50s...", user_msg)
 
-        # Retrieve memories and format recent messages with time-based filtering
-        mem_text = self.memory.retrieve(user_msg, self.user_id, self.k, self.version)
-        recent_messages = self.memory.fetch_recent(
-            self.user_id, use_time_filtering=True
+        # Search Mem0 in the background while the chat log is read locally
+        mem_future = _PREFETCH_EXECUTOR.submit(
+            self.memory.retrieve, user_msg, self.user_id, self.k, self.version
         )
-
-        # Filter out timestamps for LLM consumption
-        llm_messages = [
-            {"role": msg["role"], "content": msg["content"]} for msg in recent_messages
-        ]
+        llm_messages = self.memory.fetch_recent_for_llm(self.user_id)
+        mem_text = mem_future.result()
 
         # Generate reply with enhanced context
         reply = self.llm.chat(
@@ -126,10 +162,16 @@ class Ted:
 
         # Store conversation
         self.memory.store(user_msg, reply, self.user_id, self.agent_id)
-        self.memory.append_message(self.user_id, "user", user_msg)
-        self.memory.append_message(self.user_id, "assistant", reply)
+        self.memory.append_messages(
+            self.user_id,
+            [
+                {"role": "user", "content": user_msg},
+                {"role": "assistant", "content": reply},
+            ],
+        )
 
-        logger.info(f"Generated reply: {reply}")
+        logger.info("Generated reply (%d chars)", len(reply))
+        logger.debug("Reply: %s", reply)
         return reply
 
     def stream_reply(self, user_msg: str):
@@ -142,18 +184,14 @@ class Ted:
         Yields:
             str: The next token in the assistant's reply.
         """
-        logger.info(f"Streaming reply for: {user_msg!r}")
+        logger.info("Streaming reply for: %.50r", user_msg)
 
-        # Retrieve memories and format recent messages with time-based filtering
-        mem_text = self.memory.retrieve(user_msg, self.user_id, self.k, self.version)
-        recent_messages = self.memory.fetch_recent(
-            self.user_id, use_time_filtering=True
+        # Search Mem0 in the background while the chat log is read locally
+        mem_future = _PREFETCH_EXECUTOR.submit(
+            self.memory.retrieve, user_msg, self.user_id, self.k, self.version
         )
-
-        # Filter out timestamps for LLM consumption
-        llm_messages = [
-            {"role": msg["role"], "content": msg["content"]} for msg in recent_messages
-        ]
+        llm_messages = self.memory.fetch_recent_for_llm(self.user_id)
+        mem_text = mem_future.result()
 
         # Stream reply with enhanced context
         chunks = []
@@ -177,7 +215,70 @@ class Ted:
             self.agent_id,
         )
         fut.add_done_callback(_log_when_done)
-        self.memory.append_message(self.user_id, "user", user_msg)
-        self.memory.append_message(self.user_id, "assistant", full_reply)
+        self.memory.append_messages(
+            self.user_id,
+            [
+                {"role": "user", "content": user_msg},
+                {"role": "assistant", "content": full_reply},
+            ],
+        )
 
         logger.info("Reply streamed; memory.store() dispatched in background")
+
+    async def astream_reply(self, user_msg: str) -> AsyncIterator[str]:
+        """
+        Async counterpart of :meth:`stream_reply` for use inside an event loop.
+
+        The Mem0 and chat-log calls are blocking, so they run on worker threads;
+        the LLM tokens come straight from the async OpenAI client.
+
+        Args:
+            user_msg (str): The user's message.
+
+        Yields:
+            str: The next token in the assistant's reply.
+        """
+        logger.info("Streaming reply for: %.50r", user_msg)
+
+        # Retrieve memories and recent messages concurrently
+        mem_text, llm_messages = await asyncio.gather(
+            asyncio.to_thread(
+                self.memory.retrieve, user_msg, self.user_id, self.k, self.version
+            ),
+            asyncio.to_thread(self.memory.fetch_recent_for_llm, self.user_id),
+        )
+
+        # Stream reply with enhanced context
+        chunks = []
+        async for token in self.llm.achat_stream(
+            user_msg=user_msg,
+            mem_text=mem_text,
+            assistant_name=self.assistant_name,
+            user_name=self.user_name,
+            thread=llm_messages,
+        ):
+            chunks.append(token)
+            yield token
+
+        # Store conversation
+        full_reply = "".join(chunks).strip()
+        _spawn(self._astore(user_msg, full_reply))
+        # Both turns in one locked write, finished before the stream ends (and
+        # [END] is sent), so the next turn and /chatlog see them on any worker
+        await asyncio.to_thread(
+            self.memory.append_messages,
+            self.user_id,
+            [
+                {"role": "user", "content": user_msg},
+                {"role": "assistant", "content": full_reply},
+            ],
+        )
+
+        logger.info("Reply streamed and logged; memory.store() running in background")
+
+    async def _astore(self, user_msg: str, reply: str) -> None:
+        """memory.store() off the event loop, bounded by _STORE_SLOTS."""
+        async with _STORE_SLOTS:
+            await asyncio.to_thread(
+                self.memory.store, user_msg, reply, self.user_id, self.agent_id
+            )
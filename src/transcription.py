@@ -3,29 +3,95 @@ Audio transcription service using OpenAI's Whisper and GPT-4o models.
 Includes hallucination detection and validation for better transcription quality.
 """
 
-import io
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Dict, Any
+import os
+import re
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Any, Optional
 
 from fastapi import UploadFile, HTTPException, status
+from mutagen import File as MutagenFile
 
 from .models import TranscriptionResponse
-from .boot import llm_client
+from .boot import get_llm_client
 
 logger = logging.getLogger("ted_api.transcription")
 
 # Supported MIME types for audio uploads
-SUPPORTED_AUDIO_TYPES = {
-    "audio/wav",
-    "audio/x-wav",
-    "audio/mpeg",
-    "audio/mp3",
-    "audio/mp4",
-    "audio/x-m4a",
-    "audio/m4a",
-    "audio/webm",
-    "audio/ogg",
-}
+SUPPORTED_AUDIO_TYPES = frozenset(
+    {
+        "audio/wav",
+        "audio/x-wav",
+        "audio/mpeg",
+        "audio/mp3",
+        "audio/mp4",
+        "audio/x-m4a",
+        "audio/m4a",
+        "audio/webm",
+        "audio/ogg",
+    }
+)
+_ALLOWED_LIST = ", ".join(sorted(SUPPORTED_AUDIO_TYPES))
+# Uploads smaller than this are empty recordings; a second of compressed speech
+# (m4a/webm/ogg) is already several KB
+MIN_AUDIO_BYTES = 1024
+# Recent results kept by upload content, so a client re-sending the same audio
+# (e.g. after a dropped connection) doesn't pay for a second transcription
+TRANSCRIPTION_CACHE_SIZE = 256
+_TRANSCRIPTION_CACHE: "OrderedDict[tuple, TranscriptionResponse]" = OrderedDict()
+
+# Phrases that only show up when the model hallucinates instead of transcribing
+_HALLUCINATION_PATTERNS = (
+    "this is a high-quality",
+    "complete transcription",
+    "every spoken word is captured",
+    "speaker communicates clearly",
+    "transcription preserves all content",
+    "clear pronunciation and enunciation",
+    "speaker is using clear",
+    "perfect accuracy throughout",
+    "without omitting any segments",
+    # Common Whisper hallucinations
+    "thank you for watching",
+    "like and subscribe",
+    "don't forget to like",
+    "thanks for listening",
+    "i hope you enjoyed",
+    "see you in the next",
+    "www.beadaholique.com",  # Known spam hallucination
+    "find out more at",
+    "visit our website",
+    # Repetitive patterns that indicate hallucination
+    "the the the",
+    "and and and",
+    "but but but",
+    # Language detection fallbacks that aren't actual speech
+    "clear speech transcription",
+    "english speech",
+    "speech transcription",
+)
+# One alternation scans the text once in C instead of once per phrase
+_HALLUCINATION_RE = re.compile("|".join(map(re.escape, _HALLUCINATION_PATTERNS)))
+# Characters checked for those phrases at each end of a long transcription
+HALLUCINATION_SCAN_CHARS = 512
+
+
+# Common words that real speech shares with any prompt; they say nothing about
+# whether the prompt leaked into the transcription
+_STOPWORDS = frozenset(
+    "the a an and is are this of to in that with for on all every".split()
+)
+# Prompts with fewer content words than this are too short to compare against
+MIN_PROMPT_WORDS = 4
+
+
+@functools.lru_cache(maxsize=64)
+def _prompt_words(prompt: str) -> frozenset[str]:
+    """Lower-cased content words of a prompt; prompts come from a small fixed set."""
+    return frozenset(w for w in prompt.lower().split() if w not in _STOPWORDS)
 
 
 def is_transcription_valid(
@@ -43,54 +109,33 @@ def is_transcription_valid(
         return False
 
     transcription_clean = transcription.lower().strip()
-    prompt_clean = prompt.lower().strip()
 
     # Check if transcription contains large portions of the prompt
-    prompt_words = set(prompt_clean.split())
-    transcription_words = set(transcription_clean.split())
-
-    # If more than 30% of prompt words appear in transcription, likely hallucination
-    if len(prompt_words) > 0:
-        overlap_ratio = len(prompt_words.intersection(transcription_words)) / len(
-            prompt_words
-        )
+    prompt_words = _prompt_words(prompt)
+
+    # If more than 30% of prompt words appear in transcription, likely hallucination.
+    # Short prompts are skipped: one shared word would already cross the line,
+    # and their English echoes are in the hallucination patterns below.
+    if len(prompt_words) >= MIN_PROMPT_WORDS:
+        overlap_ratio = len(
+            prompt_words.intersection(transcription_clean.split())
+        ) / len(prompt_words)
         if overlap_ratio > 0.3:
             return False
 
-    # Check for common hallucination patterns
-    hallucination_patterns = [
-        "this is a high-quality",
-        "complete transcription",
-        "every spoken word is captured",
-        "speaker communicates clearly",
-        "transcription preserves all content",
-        "clear pronunciation and enunciation",
-        "speaker is using clear",
-        "perfect accuracy throughout",
-        "without omitting any segments",
-        # Common Whisper hallucinations
-        "thank you for watching",
-        "like and subscribe",
-        "don't forget to like",
-        "thanks for listening",
-        "i hope you enjoyed",
-        "see you in the next",
-        "www.beadaholique.com",  # Known spam hallucination
-        "find out more at",
-        "visit our website",
-        # Repetitive patterns that indicate hallucination
-        "the the the",
-        "and and and",
-        "but but but",
-        # Language detection fallbacks that aren't actual speech
-        "clear speech transcription",
-        "english speech",
-        "speech transcription",
-    ]
-
-    for pattern in hallucination_patterns:
-        if pattern in transcription_clean:
-            return False
+    # Check for common hallucination patterns. They show up at the start or end
+    # of a transcription, so long ones only need their two ends scanned; the
+    # newline keeps a phrase from matching across the seam.
+    if len(transcription_clean) > 2 * HALLUCINATION_SCAN_CHARS:
+        scan_region = (
+            transcription_clean[:HALLUCINATION_SCAN_CHARS]
+            + "\n"
+            + transcription_clean[-HALLUCINATION_SCAN_CHARS:]
+        )
+    else:
+        scan_region = transcription_clean
+    if _HALLUCINATION_RE.search(scan_region):
+        return False
 
     # Check for suspiciously long transcription on short audio
     if audio_duration_seconds and audio_duration_seconds < 2.0:
@@ -103,15 +148,28 @@ def is_transcription_valid(
     return True
 
 
-def get_audio_duration(audio_bytes: bytes) -> float:
+def get_audio_duration(audio_size: int, audio_file: Optional[BinaryIO] = None) -> float:
     """
-    Estimate audio duration from audio bytes.
-    This is a rough estimation for validation purposes.
+    Get the audio duration, from the container headers when they can be read.
+
+    mutagen only reads the headers (plus the last page for Ogg), so this stays
+    cheap for large uploads. Formats it can't parse (e.g. WebM) fall back to a
+    rough estimate from the size, which is good enough for validation.
     """
+    if audio_file is not None:
+        try:
+            parsed = MutagenFile(audio_file)
+            if parsed is not None and parsed.info.length:
+                return max(0.1, parsed.info.length)
+        except Exception as e:
+            logger.debug("Could not read audio headers: %s", e)
+        finally:
+            audio_file.seek(0)
+
     try:
         # For basic estimation, assume common audio formats
         # This is rough but good enough for validation
-        estimated_duration = len(audio_bytes) / (16000 * 2)  # Assume 16kHz, 16-bit
+        estimated_duration = audio_size / (16000 * 2)  # Assume 16kHz, 16-bit
         return max(0.1, estimated_duration)  # Minimum 0.1 seconds
     except:
         return 1.0  # Default fallback
@@ -127,45 +185,57 @@ def generate_transcription_prompt(
     Based on OpenAI's research, longer, more contextual prompts work better than simple instructions.
     This helps especially with quiet speech and ensuring complete transcription.
     """
+    # Only the short/long split depends on the duration, so every prompt is one
+    # of a few dozen strings; build each once
+    short_audio = bool(audio_duration and audio_duration < 3.0)
+    return _transcription_prompt(language, short_audio)
+
+
+# Minimal per-language prompts for very short clips
+_SHORT_LANGUAGE_PROMPTS = {
+    "en": "English speech.",
+    "es": "Habla en español.",
+    "fr": "Parole française.",
+    "de": "Deutsche Sprache.",
+    "it": "Parlato italiano.",
+    "pt": "Fala portuguesa.",
+    "ru": "Русская речь.",
+    "ja": "日本語の音声。",
+    "ko": "한국어 음성.",
+    "zh": "中文语音。",
+}
+
+# Language-specific context appended to the enhanced prompt
+_LANGUAGE_CONTEXT = {
+    "en": "The speaker is using clear English pronunciation and enunciation.",
+    "es": "El hablante usa una pronunciación y enunciación clara en español.",
+    "fr": "Le locuteur utilise une prononciation et une énonciation claires en français.",
+    "de": "Der Sprecher verwendet eine klare deutsche Aussprache und Artikulation.",
+    "it": "Il parlante usa una pronunciazione e enunciazione italiana chiara.",
+    "pt": "O falante usa pronúncia e enunciação claras em português.",
+    "ru": "Говорящий использует четкое русское произношение и артикуляцию.",
+    "ja": "話者は明確な日本語の発音と話し方を使用しています。",
+    "ko": "화자는 명확한 한국어 발음과 구사를 사용합니다.",
+    "zh": "说话者使用清晰的中文发音和表达。",
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _transcription_prompt(language: str | None, short_audio: bool) -> str:
+    """Cached body of :func:`generate_transcription_prompt`."""
     # For very short audio (< 3 seconds), use minimal prompt to avoid hallucination
-    if audio_duration and audio_duration < 3.0:
+    if short_audio:
         base_prompt = "Clear speech transcription."
         if language:
-            simple_context = {
-                "en": "English speech.",
-                "es": "Habla en español.",
-                "fr": "Parole française.",
-                "de": "Deutsche Sprache.",
-                "it": "Parlato italiano.",
-                "pt": "Fala portuguesa.",
-                "ru": "Русская речь.",
-                "ja": "日本語の音声。",
-                "ko": "한국어 음성.",
-                "zh": "中文语音。",
-            }
-            if language.lower() in simple_context:
-                base_prompt = simple_context[language.lower()]
+            base_prompt = _SHORT_LANGUAGE_PROMPTS.get(language.lower(), base_prompt)
         return base_prompt
 
     # For longer audio, use the enhanced prompt
     base_prompt = "This is a high-quality, complete transcription where every spoken word is captured with perfect accuracy. The speaker communicates clearly and deliberately, and even during quiet moments, soft speech, or brief pauses, every word and phrase is transcribed in full. The transcription preserves all content without omitting any segments, ensuring completeness throughout the entire recording. All speech is transcribed verbatim, including quiet or softly spoken words."
 
     # Add language-specific context if provided
-    if language:
-        language_context = {
-            "en": "The speaker is using clear English pronunciation and enunciation.",
-            "es": "El hablante usa una pronunciación y enunciación clara en español.",
-            "fr": "Le locuteur utilise une prononciation et une énonciation claires en français.",
-            "de": "Der Sprecher verwendet eine klare deutsche Aussprache und Artikulation.",
-            "it": "Il parlante usa una pronunciazione e enunciazione italiana chiara.",
-            "pt": "O falante usa pronúncia e enunciação claras em português.",
-            "ru": "Говорящий использует четкое русское произношение и артикуляцию.",
-            "ja": "話者は明確な日本語の発音と話し方を使用しています。",
-            "ko": "화자는 명확한 한국어 발음과 구사를 사용합니다.",
-            "zh": "说话者使用清晰的中文发音和表达。",
-        }
-        if language.lower() in language_context:
-            base_prompt += f" {language_context[language.lower()]}"
+    if language and language.lower() in _LANGUAGE_CONTEXT:
+        base_prompt += f" {_LANGUAGE_CONTEXT[language.lower()]}"
 
     return base_prompt
 
@@ -190,29 +260,68 @@ async def transcribe_audio(
     if file.content_type not in SUPPORTED_AUDIO_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file type. Allowed: {', '.join(sorted(SUPPORTED_AUDIO_TYPES))}",
+            detail=f"Unsupported file type. Allowed: {_ALLOWED_LIST}",
         )
 
-    audio_bytes = await file.read()
+    # Hand the spooled upload to the SDK as-is rather than copying it into memory
+    audio_file = file.file
+    audio_size = file.size
+    if audio_size is None:
+        audio_size = audio_file.seek(0, os.SEEK_END)
+        audio_file.seek(0)
     logger.info(
-        f"Transcribing {file.filename} ({len(audio_bytes)} bytes) "
+        f"Transcribing {file.filename} ({audio_size} bytes) "
         f"with {model}, lang={language}, content_type={file.content_type}"
     )
 
-    # Estimate audio duration for validation
-    estimated_duration = get_audio_duration(audio_bytes)
-    logger.debug(f"Estimated audio duration: {estimated_duration:.2f} seconds")
+    # Nothing but container headers fits in this little; don't pay a round-trip
+    # (and a retry) just to be told there's no speech
+    if audio_size < MIN_AUDIO_BYTES:
+        logger.info("Audio too small to contain speech, returning empty transcription")
+        return TranscriptionResponse(model=model, language=language, transcription="")
+
+    # Hashing reads the whole upload, so keep it off the event loop
+    cache_key = (await asyncio.to_thread(_audio_digest, audio_file), model, language)
+    cached = _TRANSCRIPTION_CACHE.get(cache_key)
+    if cached is not None:
+        _TRANSCRIPTION_CACHE.move_to_end(cache_key)
+        logger.info("Returning cached transcription for identical audio")
+        return cached
+
+    result = await _transcribe(file, audio_size, language, model)
+    # Empty results can come from a failed retry, so only keep real text
+    if result.transcription:
+        _TRANSCRIPTION_CACHE[cache_key] = result
+        if len(_TRANSCRIPTION_CACHE) > TRANSCRIPTION_CACHE_SIZE:
+            _TRANSCRIPTION_CACHE.popitem(last=False)
+    return result
+
+
+def _audio_digest(audio_file: BinaryIO) -> str:
+    """Content hash of an upload, leaving the file rewound for the SDK."""
+    try:
+        return hashlib.file_digest(audio_file, "blake2b").hexdigest()
+    finally:
+        audio_file.seek(0)
 
-    # Wrap bytes in a file-like object as the SDK expects
-    audio_file = io.BytesIO(audio_bytes)
-    audio_file.name = file.filename
+
+async def _transcribe(
+    file: UploadFile, audio_size: int, language: str | None, model: str
+) -> TranscriptionResponse:
+    """Uncached body of :func:`transcribe_audio`, past the upload checks."""
+    audio_file = file.file
+
+    # Audio duration for validation; a wrong guess here flags real speech as
+    # hallucinated and costs a retry round-trip
+    estimated_duration = get_audio_duration(audio_size, audio_file)
+    logger.debug(f"Estimated audio duration: {estimated_duration:.2f} seconds")
 
     # Generate appropriate prompt based on audio duration
     prompt_text = generate_transcription_prompt(language, estimated_duration)
 
     # Build the request payload
     kwargs: Dict[str, Any] = {
-        "file": audio_file,
+        "file": (file.filename, audio_file, file.content_type),
         "model": model,
         "prompt": prompt_text,
         "language": language,
@@ -221,10 +330,12 @@ async def transcribe_audio(
     }
     # Strip None values to avoid API complaints
     clean_kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    # Async client, so the upload and the model's wait don't block the event loop
+    transcriptions = get_llm_client().aclient.audio.transcriptions
 
     try:
         logger.info(f"Sending transcription request with kwargs: {clean_kwargs}")
-        response = llm_client.client.audio.transcriptions.create(**clean_kwargs)
+        response = await transcriptions.create(**clean_kwargs)
         logger.info(f"Transcription successful with {model}")
 
         # Extract the text from the response object - handle both text and json formats
@@ -247,7 +358,7 @@ async def transcribe_audio(
 
             # For very short audio or no speech detected, return empty result
             if (
-                estimated_duration < 1.0 or len(audio_bytes) < 5000
+                estimated_duration < 1.0 or audio_size < 5000
             ):  # Less than 1 second or very small file
                 logger.info(
                     "Audio too short or no speech detected, returning empty transcription"
@@ -265,9 +376,7 @@ async def transcribe_audio(
             minimal_kwargs["prompt"] = "Speech transcription."
 
             try:
-                response = llm_client.client.audio.transcriptions.create(
-                    **minimal_kwargs
-                )
+                response = await transcriptions.create(**minimal_kwargs)
                 retry_transcription = (
                     response.text if hasattr(response, "text") else str(response)
                 )
@@ -317,9 +426,7 @@ async def transcribe_audio(
 
             try:
                 logger.info(f"Retrying transcription with whisper-1")
-                response = llm_client.client.audio.transcriptions.create(
-                    **fallback_kwargs
-                )
+                response = await transcriptions.create(**fallback_kwargs)
                 logger.info(f"Transcription successful with whisper-1 fallback")
 
                 fallback_transcription = (
@@ -0,0 +1,3 @@
+"""
+Streamlit UI building blocks for the Ted chat front-ends.
+"""
@@ -0,0 +1,88 @@
+"""
+Reusable Streamlit chat page.
+
+Entry-point scripts (e.g. ``app.py``) stay a few lines long and hand an agent
+factory to :func:`run`; everything Streamlit re-executes on a rerun lives here.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import streamlit as st
+
+from src.memory import MemoryManager
+from src.ted import Ted
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_recent(uid: str, _memory: MemoryManager) -> list[dict[str, str]]:
+    """Recent messages for *uid*, cached across reruns until a new turn lands."""
+    return _memory.fetch_recent(uid)
+
+
+def run(agent_factory: Callable[[str], Ted], title: str, default_user: str) -> None:
+    """
+    Render the chat page for the agent returned by ``agent_factory(default_user)``.
+
+    Args:
+        agent_factory: Callable building (or returning a cached) agent for a user_id.
+        title: Page heading shown above the conversation.
+        default_user: The user_id the page chats as.
+    """
+    # -----------------------------------------------------------------------
+    # Session initialisation
+    # -----------------------------------------------------------------------
+    if "history" not in st.session_state:
+        st.session_state.history = []  # [(role, text), ...]
+
+    agent = agent_factory(default_user)
+    user_id = agent.user_id
+    name = agent.assistant_name
+
+    # -----------------------------------------------------------------------
+    # Sidebar conversation management
+    # -----------------------------------------------------------------------
+    st.sidebar.title(name)
+    st.sidebar.markdown(f"""
+**Tips**
+- {name} *remembers* what you say.
+- Ask follow-up questions; the answers shape his memory.
+- Use `🗑️ Clear chat window` to start fresh (dev only).
+""")
+
+    # Hard reset (dev only)
+    if st.sidebar.button("🗑️ Clear chat window"):
+        st.session_state.clear_chat = True
+        st.session_state.history_loaded = False
+        st.rerun()
+
+    # ---------- main chat ----------
+    st.title(title)
+
+    # session_state is authoritative once loaded; only hit the log once per session
+    if getattr(st.session_state, "clear_chat", False):
+        st.session_state.history = []
+        st.session_state.clear_chat = False
+    elif not st.session_state.get("history_loaded", False):
+        recent_msgs = _cached_recent(user_id, agent.memory)
+        st.session_state.history = [(m["role"], m["content"]) for m in recent_msgs]
+        st.session_state.history_loaded = True
+
+    for role, text in st.session_state.history:
+        with st.chat_message(role):
+            st.markdown(text)
+
+    if prompt := st.chat_input(f"Tell {name} something…"):
+        # show user msg immediately
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        st.session_state.history.append(("user", prompt))
+
+        # get the agent's reply
+        with st.chat_message("assistant"):
+            response = st.write_stream(agent.stream_reply(prompt))
+        st.session_state.history.append(("assistant", response))
+        # Both messages are already on screen and in session_state, so no
+        # rerun is needed; just drop the stale log for other sessions
+        _cached_recent.clear()
@@ -4,13 +4,15 @@ Utility functions and helpers for the Ted application.
 This module contains various utility functions that are used across the application.
 """
 
+import functools
 import re
+import time
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timezone
 
 from .config import (
-    USER_TZ,
+    user_tz,
     MESSAGE_FRESHNESS_HOURS,
     MAX_STALE_MESSAGES,
     TIME_BREAK_THRESHOLD_HOURS,
@@ -18,6 +20,33 @@ from .config import (
 
 logger = logging.getLogger("TedUtils")
 
+_SENTENCE_END = re.compile(r"([.?!])\s+")
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+_WEEKDAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+_MONTH_NAMES = (
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+)
+
 
 def format_timestamp(timestamp: str) -> str:
     """
@@ -30,10 +59,15 @@ def format_timestamp(timestamp: str) -> str:
         str: Human-readable timestamp
     """
     try:
-        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        iso = timestamp[:-1] + "+00:00" if timestamp.endswith("Z") else timestamp
+        dt = datetime.fromisoformat(iso)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
-        return dt.strftime("%Y-%m-%d %H:%M:%S %Z")
+        # strftime("%Y-%m-%d %H:%M:%S %Z") without the format-string parsing
+        return (
+            f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d} {dt.tzname()}"
+        )
     except Exception as e:
         logger.warning(f"Failed to parse timestamp: {timestamp}, error: {e}")
         return timestamp
@@ -52,7 +86,7 @@ def sanitize_text(text: str) -> str:
     if not text:
         return ""
     # Replace multiple newlines with a single newline
-    text = re.sub(r"\n\s*\n", "\n", text)
+    text = _BLANK_LINES.sub("\n", text)
     # Trim leading/trailing whitespace
     return text.strip()
 
@@ -72,34 +106,35 @@ def chunk_text(text: str, max_chunk_size: int = 1000) -> List[str]:
     if not text or len(text) <= max_chunk_size:
         return [text] if text else []
 
-    # Try to split on sentence boundaries (period followed by space)
+    # Split on sentence boundaries (., ? or ! followed by whitespace), keeping
+    # the punctuation and collapsing the whitespace to one space. Slices are
+    # collected per chunk and joined once, so long inputs stay linear.
     chunks = []
-    current_chunk = ""
-
-    sentences = re.split(r"(\.|\?|!)\s+", text)
-    # This creates pairs of sentences and their ending punctuation
-    i = 0
-    while i < len(sentences):
-        if i + 1 < len(sentences):
-            # Combine sentence with its punctuation
-            sentence = sentences[i] + sentences[i + 1]
-            i += 2
-        else:
-            # Last element might not have punctuation
-            sentence = sentences[i]
-            i += 1
-
-        if len(current_chunk) + len(sentence) <= max_chunk_size:
-            current_chunk += sentence + " "
+    current: List[str] = []
+    current_len = 0  # length of the chunk so far, counting a space per sentence
+
+    start = 0
+    sentences = []
+    for match in _SENTENCE_END.finditer(text):
+        sentences.append(text[start : match.end(1)])
+        start = match.end()
+    # Last element might not have punctuation
+    sentences.append(text[start:])
+
+    for sentence in sentences:
+        if current_len + len(sentence) <= max_chunk_size:
+            current.append(sentence)
+            current_len += len(sentence) + 1
         else:
             # If current chunk is not empty, add it to chunks
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence + " "
+            if current:
+                chunks.append(" ".join(current).strip())
+            current = [sentence]
+            current_len = len(sentence) + 1
 
     # Add the last chunk if not empty
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    if current:
+        chunks.append(" ".join(current).strip())
 
     return chunks
 
@@ -111,13 +146,22 @@ def get_time_context() -> str:
     Returns:
         str: Formatted time context string including current time, date, and situational context
     """
-    now_utc = datetime.now(timezone.utc)
-    local_time = now_utc.astimezone(USER_TZ)
+    # The text has minute resolution, so build it at most once a minute
+    return _time_context_for_minute(int(time.time()) // 60)
+
 
-    # Format components
-    weekday = local_time.strftime("%A")
-    date_str = local_time.strftime("%B %d, %Y")
-    time_str = local_time.strftime("%H:%M")
+@functools.lru_cache(maxsize=1)
+def _time_context_for_minute(minute: int) -> str:
+    """Time context for the UTC minute ``minute`` (minutes since the epoch)."""
+    now_utc = datetime.fromtimestamp(minute * 60, timezone.utc)
+    local_time = now_utc.astimezone(user_tz())
+
+    # Format components (same text as strftime "%A", "%B %d, %Y" and "%H:%M")
+    weekday = _WEEKDAY_NAMES[local_time.weekday()]
+    date_str = (
+        f"{_MONTH_NAMES[local_time.month - 1]} {local_time.day:02d}, {local_time.year}"
+    )
+    time_str = f"{local_time.hour:02d}:{local_time.minute:02d}"
 
     # Determine time of day context
     hour = local_time.hour
@@ -175,9 +219,13 @@ def filter_messages_by_time_gaps(
 
     now_utc = datetime.now(timezone.utc)
 
-    # Convert timestamps and add time deltas
-    processed_messages = []
-    for msg in messages:
+    # One pass: age each message and find the last conversation break. The
+    # input dicts are only read; the trimmed output is built from them at the end.
+    ages: List[float] = []
+    any_stale = False
+    last_break = 0
+    prev_ts = None
+    for i, msg in enumerate(messages):
         try:
             # Parse the timestamp
             ts_str = msg.get("timestamp", "")
@@ -187,73 +235,55 @@ def filter_messages_by_time_gaps(
                     ts = ts.replace(tzinfo=timezone.utc)
             else:
                 ts = now_utc  # Fallback for messages without timestamps
-
-            processed_messages.append(
-                {
-                    **msg,
-                    "parsed_timestamp": ts,
-                    "age_hours": (now_utc - ts).total_seconds() / 3600,
-                }
-            )
+            age = (now_utc - ts).total_seconds() / 3600
         except Exception as e:
             logger.warning(f"Error parsing timestamp {ts_str}: {e}")
             # Include message with current time as fallback
-            processed_messages.append(
-                {**msg, "parsed_timestamp": now_utc, "age_hours": 0}
-            )
+            ts, age = now_utc, 0
+
+        # Calculate gap from the previous message
+        if prev_ts is not None:
+            gap = (ts - prev_ts).total_seconds() / 3600
+            if gap >= TIME_BREAK_THRESHOLD_HOURS:
+                last_break = i
+                logger.debug(
+                    "Found conversation break at index %d, gap: %.1f hours", i, gap
+                )
+        prev_ts = ts
+        ages.append(age)
+        if age > MESSAGE_FRESHNESS_HOURS:
+            any_stale = True
 
     # If all messages are recent, return all (up to limit)
-    if all(msg["age_hours"] <= MESSAGE_FRESHNESS_HOURS for msg in processed_messages):
+    if not any_stale:
         return [
             {
                 "role": msg["role"],
                 "content": msg["content"],
                 "timestamp": msg["timestamp"],
             }
-            for msg in processed_messages[-20:]
+            for msg in messages[-20:]
         ]  # Keep last 20 if all fresh
 
-    # Find conversation breaks
-    breaks = []
-    for i in range(1, len(processed_messages)):
-        prev_msg = processed_messages[i - 1]
-        curr_msg = processed_messages[i]
-
-        # Calculate gap between messages
-        gap = (
-            curr_msg["parsed_timestamp"] - prev_msg["parsed_timestamp"]
-        ).total_seconds() / 3600
-
-        if gap >= TIME_BREAK_THRESHOLD_HOURS:
-            breaks.append(i)
-            logger.debug(f"Found conversation break at index {i}, gap: {gap:.1f} hours")
-
     # If there are breaks, start from the most recent conversation segment
-    if breaks:
-        # Start from the last break point
-        start_index = breaks[-1]
-        recent_segment = processed_messages[start_index:]
+    if last_break:
+        recent_segment = messages[last_break:]
 
         # If the recent segment is very stale, limit to fewer messages
-        if recent_segment and recent_segment[0]["age_hours"] > MESSAGE_FRESHNESS_HOURS:
+        if ages[last_break] > MESSAGE_FRESHNESS_HOURS:
             recent_segment = recent_segment[-MAX_STALE_MESSAGES:]
-            logger.info(f"Limited stale conversation to {len(recent_segment)} messages")
-    else:
-        # No major breaks, but check overall freshness
-        if (
-            processed_messages
-            and processed_messages[-1]["age_hours"] > MESSAGE_FRESHNESS_HOURS
-        ):
-            # Conversation is stale, limit number of messages
-            recent_segment = processed_messages[-MAX_STALE_MESSAGES:]
             logger.info(
-                f"Conversation is stale, limited to {len(recent_segment)} messages"
+                "Limited stale conversation to %d messages", len(recent_segment)
             )
-        else:
-            # Recent conversation, include more context
-            recent_segment = processed_messages[
-                -20:
-            ]  # Include up to 20 recent messages
+    elif ages[-1] > MESSAGE_FRESHNESS_HOURS:
+        # No major breaks, but the conversation is stale, limit number of messages
+        recent_segment = messages[-MAX_STALE_MESSAGES:]
+        logger.info(
+            "Conversation is stale, limited to %d messages", len(recent_segment)
+        )
+    else:
+        # Recent conversation, include more context
+        recent_segment = messages[-20:]  # Include up to 20 recent messages
 
     # Clean up the returned messages
     result = [
@@ -262,7 +292,7 @@ def filter_messages_by_time_gaps(
     ]
 
     logger.info(
-        f"Filtered {len(messages)} messages down to {len(result)} based on time gaps"
+        "Filtered %d messages down to %d based on time gaps", len(messages), len(result)
     )
     return result
 
@@ -281,20 +311,33 @@ def detect_conversation_resumption(
     """
     if len(messages) < 2:
         return False, None
+    return resumption_hint(messages[-1].get("timestamp"))
+
+
+def resumption_hint(last_timestamp: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Resumption check for a conversation whose latest message has ``last_timestamp``.
+
+    Args:
+        last_timestamp: ISO timestamp of the most recent message, if known
+
+    Returns:
+        Tuple of (is_resumption, context_hint)
+    """
+    if not last_timestamp:
+        return False, None
 
     try:
         # Get the gap between the last two conversation segments
         now_utc = datetime.now(timezone.utc)
-        last_msg_ts = datetime.fromisoformat(
-            messages[-1]["timestamp"].replace("Z", "+00:00")
-        )
+        last_msg_ts = datetime.fromisoformat(last_timestamp.replace("Z", "+00:00"))
         if last_msg_ts.tzinfo is None:
             last_msg_ts = last_msg_ts.replace(tzinfo=timezone.utc)
 
         gap_hours = (now_utc - last_msg_ts).total_seconds() / 3600
 
         if gap_hours > TIME_BREAK_THRESHOLD_HOURS:
-            local_time = now_utc.astimezone(USER_TZ)
+            local_time = now_utc.astimezone(user_tz())
 
             if gap_hours >= 12:  # More than 12 hours
                 if 6 <= local_time.hour <= 11:
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-user JSONL chat log: legacy migration, torn lines and tail reads.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+import orjson
+
+import src.memory as memory
+from src.memory import MemoryManager
+
+
+@contextmanager
+def temp_chat_log(tail_block_bytes=None):
+    """Point the chat log at a temp dir (optionally with tiny tail-read blocks)."""
+    saved = (memory.LOG_DIR, memory.LOG_FILE, memory.TAIL_BLOCK_BYTES)
+    with tempfile.TemporaryDirectory() as tmp:
+        memory.LOG_DIR = os.path.join(tmp, "chatlog")
+        memory.LOG_FILE = os.path.join(tmp, "chatlog.json")
+        if tail_block_bytes:
+            memory.TAIL_BLOCK_BYTES = tail_block_bytes
+        try:
+            yield tmp
+        finally:
+            memory.LOG_DIR, memory.LOG_FILE, memory.TAIL_BLOCK_BYTES = saved
+
+
+def recent(manager, user_id, **kwargs):
+    """Contents of fetch_recent without time filtering."""
+    return [
+        m["content"]
+        for m in manager.fetch_recent(user_id, use_time_filtering=False, **kwargs)
+    ]
+
+
+def test_legacy_log_migrates_once():
+    """The old single-file log is split per user once and then set aside."""
+    with temp_chat_log():
+        legacy = {
+            "alice": [
+                {"role": "user", "content": "hi", "timestamp": "2025-01-01T10:00:00"},
+                {
+                    "role": "assistant",
+                    "content": "yo",
+                    "timestamp": "2025-01-01T10:00:01",
+                },
+            ],
+            "李雷": [
+                {"role": "user", "content": "你好", "timestamp": "2025-01-01T11:00:00"}
+            ],
+        }
+        os.makedirs(os.path.dirname(memory.LOG_FILE), exist_ok=True)
+        with open(memory.LOG_FILE, "wb") as f:
+            f.write(orjson.dumps(legacy))
+
+        manager = MemoryManager(None)
+        assert not os.path.exists(memory.LOG_FILE)
+        assert os.path.exists(f"{memory.LOG_FILE}.migrated")
+        assert recent(manager, "alice", limit=10) == ["hi", "yo"]
+        assert recent(manager, "李雷", limit=10) == ["你好"]
+
+        # Another worker starting up must not import the messages again
+        manager = MemoryManager(None)
+        assert recent(manager, "alice", limit=10) == ["hi", "yo"]
+
+
+def test_append_after_torn_line():
+    """A torn last line gets a newline first and is skipped on read."""
+    with temp_chat_log():
+        manager = MemoryManager(None)
+        manager.append_message("bob", "user", "complete")
+        path = memory._user_log_path("bob")
+        with open(path, "ab") as f:
+            f.write(b'{"role": "user", "cont')  # crashed mid-append
+
+        manager.append_message("bob", "assistant", "after the tear")
+
+        with open(path, "rb") as f:
+            lines = f.read().split(b"\n")
+        assert lines[1] == b'{"role": "user", "cont'
+        assert orjson.loads(lines[2])["content"] == "after the tear"
+        # The torn line doesn't count towards the limit
+        assert recent(manager, "bob", limit=2) == ["complete", "after the tear"]
+
+
+def test_fetch_recent_pages_across_blocks():
+    """offset/limit pages match a full read when lines span tail-read blocks."""
+    with temp_chat_log(tail_block_bytes=64):
+        manager = MemoryManager(None)
+        contents = [f"message {i} " + "x" * (i * 7 % 90) for i in range(40)]
+        for i, content in enumerate(contents):
+            manager.append_message("carol", "user", content)
+            if i == 25:
+                with open(memory._user_log_path("carol"), "ab") as f:
+                    f.write(b"{not json")
+
+        for offset, limit in [(0, 1), (0, 12), (3, 7), (10, 10), (14, 30), (35, 10)]:
+            end = len(contents) - offset
+            expected = contents[max(0, end - limit) : end]
+            assert recent(manager, "carol", offset=offset, limit=limit) == expected
+        assert recent(manager, "carol", offset=40, limit=5) == []
+
+
+if __name__ == "__main__":
+    test_legacy_log_migrates_once()
+    test_append_after_torn_line()
+    test_fetch_recent_pages_across_blocks()
+    print("All chat log tests passed!")
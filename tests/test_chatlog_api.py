@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the /chatlog endpoint's caching headers, run against a temporary log dir.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.memory as memory
+from src.api import chat_routes
+from src.memory import MemoryManager
+
+
+@contextmanager
+def chatlog_client():
+    """TestClient for the chat routes, backed by a MemoryManager in a temp dir."""
+    saved = (memory.LOG_DIR, memory.LOG_FILE, chat_routes.get_memory_manager)
+    with tempfile.TemporaryDirectory() as tmp:
+        memory.LOG_DIR = os.path.join(tmp, "chatlog")
+        memory.LOG_FILE = os.path.join(tmp, "chatlog.json")
+        # Mem0 is never touched by the log endpoints
+        manager = MemoryManager(None)
+        chat_routes.get_memory_manager = lambda: manager
+        app = FastAPI()
+        app.include_router(chat_routes.router)
+        try:
+            yield TestClient(app), manager
+        finally:
+            memory.LOG_DIR, memory.LOG_FILE, chat_routes.get_memory_manager = saved
+
+
+def test_non_ascii_user_id():
+    """Any user_id works and stays out of the ETag header."""
+    with chatlog_client() as (client, manager):
+        for user in ("李雷", "josé", 'say "hi"'):
+            manager.append_message(user, "user", f"hello from {user}")
+            response = client.get("/chatlog", params={"user_id": user, "limit": 5})
+            assert response.status_code == 200
+            assert response.json()[0]["content"] == f"hello from {user}"
+            etag = response.headers["etag"]
+            etag.encode("ascii")
+            assert etag.startswith('W/"') and etag.count('"') == 2
+            assert response.headers["vary"] == "Accept"
+
+
+def test_etag_round_trip():
+    """A matching If-None-Match gets a 304 until the log changes."""
+    with chatlog_client() as (client, manager):
+        manager.append_message("u1", "user", "first")
+        params = {"user_id": "u1", "limit": 10}
+
+        response = client.get("/chatlog", params=params)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        cached = client.get("/chatlog", params=params, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+        assert cached.headers["vary"] == "Accept"
+
+        # NDJSON is a different representation of the same URL
+        ndjson = client.get(
+            "/chatlog",
+            params=params,
+            headers={"Accept": "application/x-ndjson", "If-None-Match": etag},
+        )
+        assert ndjson.status_code == 200
+        assert ndjson.headers["etag"] != etag
+
+        manager.append_message("u1", "assistant", "second")
+        fresh = client.get("/chatlog", params=params, headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert [m["content"] for m in fresh.json()] == ["first", "second"]
+
+
+if __name__ == "__main__":
+    test_non_ascii_user_id()
+    test_etag_round_trip()
+    print("All chat log API tests passed!")
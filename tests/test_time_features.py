@@ -73,27 +73,32 @@ def test_message_filtering():
         },
     ]
 
-    print(f"Original messages: {len(messages)}")
-    for i, msg in enumerate(messages):
-        local_time = datetime.fromisoformat(
-            msg["timestamp"].replace("Z", "+00:00")
-        ).astimezone(USER_TZ)
-        print(
-            f"  {i+1}. [{local_time.strftime('%H:%M')}] {msg['role']}: {msg['content']}"
+    # Local clock labels, parsed once per timestamp; the filtered messages
+    # carry the same timestamps, so they reuse these
+    local_times = {}
+    for msg in messages:
+        ts = msg["timestamp"]
+        local_times[ts] = (
+            datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            .astimezone(USER_TZ)
+            .strftime("%H:%M")
+        )
+
+    def listing(msgs):
+        return "\n".join(
+            f"  {i+1}. [{local_times[msg['timestamp']]}] {msg['role']}: {msg['content']}"
+            for i, msg in enumerate(msgs)
         )
 
+    print(f"Original messages: {len(messages)}")
+    print(listing(messages))
+
     print()
 
     # Test filtering
     filtered = filter_messages_by_time_gaps(messages)
     print(f"Filtered messages: {len(filtered)}")
-    for i, msg in enumerate(filtered):
-        local_time = datetime.fromisoformat(
-            msg["timestamp"].replace("Z", "+00:00")
-        ).astimezone(USER_TZ)
-        print(
-            f"  {i+1}. [{local_time.strftime('%H:%M')}] {msg['role']}: {msg['content']}"
-        )
+    print(listing(filtered))
 
     print()
 
@@ -3,8 +3,9 @@
 Test script for the transcription endpoint with fallback mechanism.
 """
 
-import requests
+import httpx
 import io
+import math
 import wave
 import numpy as np
 import tempfile
@@ -18,11 +19,11 @@ def create_test_audio():
     duration = 2  # seconds
     frequency = 440  # Hz (A note)
 
-    t = np.linspace(0, duration, int(sample_rate * duration), False)
-    audio_data = np.sin(2 * np.pi * frequency * t) * 0.3
-
-    # Convert to 16-bit integers
-    audio_data = (audio_data * 32767).astype(np.int16)
+    # The tone repeats every sample_rate / gcd(sample_rate, frequency) samples;
+    # synthesize one period as 16-bit integers and tile it
+    period = sample_rate // math.gcd(sample_rate, frequency)
+    cycle = np.sin(2 * np.pi * frequency / sample_rate * np.arange(period)) * 0.3
+    audio_data = np.resize((cycle * 32767).astype(np.int16), sample_rate * duration)
 
     # Create WAV file in memory
     with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
@@ -30,7 +31,7 @@ def create_test_audio():
             wav_file.setnchannels(1)  # Mono
             wav_file.setsampwidth(2)  # 16-bit
             wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_data.tobytes())
+            wav_file.writeframes(audio_data)  # buffer protocol, no copy
 
         return temp_file.name
 
@@ -39,48 +40,53 @@ def test_transcription_endpoint():
     """Test the transcription endpoint."""
     # Create test audio file
     audio_file_path = create_test_audio()
+    # Read once; both requests upload the same bytes
+    with open(audio_file_path, "rb") as f:
+        audio_bytes = f.read()
+
+    # One keep-alive connection for both requests
+    session = httpx.Client(http2=True, timeout=30)
 
     try:
         # Test with gpt-4o-transcribe (should fallback to whisper-1)
         print("Testing transcription with gpt-4o-transcribe...")
 
-        with open(audio_file_path, "rb") as f:
-            files = {"file": ("test_audio.wav", f, "audio/wav")}
-            params = {"model": "gpt-4o-transcribe"}
+        files = {"file": ("test_audio.wav", audio_bytes, "audio/wav")}
+        params = {"model": "gpt-4o-transcribe"}
 
-            response = requests.post(
-                "http://localhost:8000/transcribe_audio", files=files, params=params
-            )
+        response = session.post(
+            "http://localhost:8000/transcribe_audio", files=files, params=params
+        )
 
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ Success! Model used: {result['model']}")
-                print(f"Transcription: {result['transcription']}")
-            else:
-                print(f"❌ Error: {response.status_code}")
-                print(f"Response: {response.text}")
+        if response.status_code == 200:
+            result = response.json()
+            print(f"✅ Success! Model used: {result['model']}")
+            print(f"Transcription: {result['transcription']}")
+        else:
+            print(f"❌ Error: {response.status_code}")
+            print(f"Response: {response.text}")
 
         # Test with whisper-1 directly
         print("\nTesting transcription with whisper-1...")
 
-        with open(audio_file_path, "rb") as f:
-            files = {"file": ("test_audio.wav", f, "audio/wav")}
-            params = {"model": "whisper-1"}
+        files = {"file": ("test_audio.wav", audio_bytes, "audio/wav")}
+        params = {"model": "whisper-1"}
 
-            response = requests.post(
-                "http://localhost:8000/transcribe_audio", files=files, params=params
-            )
+        response = session.post(
+            "http://localhost:8000/transcribe_audio", files=files, params=params
+        )
 
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ Success! Model used: {result['model']}")
-                print(f"Transcription: {result['transcription']}")
-            else:
-                print(f"❌ Error: {response.status_code}")
-                print(f"Response: {response.text}")
+        if response.status_code == 200:
+            result = response.json()
+            print(f"✅ Success! Model used: {result['model']}")
+            print(f"Transcription: {result['transcription']}")
+        else:
+            print(f"❌ Error: {response.status_code}")
+            print(f"Response: {response.text}")
 
     finally:
         # Clean up
+        session.close()
         os.unlink(audio_file_path)
 
 